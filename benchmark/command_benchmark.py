@@ -0,0 +1,70 @@
+"""
+指令解析性能测试
+
+对比旧的指令解析与当前指令解析每条消息的耗时
+
+    python benchmark/command_benchmark.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pycqBot.cqHttpApi import cqHttpApi
+
+
+def old_set_command_key(commandSign_option: str, message: str):
+    if commandSign_option != "" and list(message):
+        commandSign = list(message)[0]
+    else:
+        commandSign = ""
+
+    command_str_list = message.split(" ")
+    command = command_str_list[0].lstrip(commandSign)
+    commandData = command_str_list[1:]
+
+    return commandSign, command, commandData
+
+
+def old_route(commandSign_option: str, command_list: dict, message: str):
+    commandSign, command, commandData = old_set_command_key(commandSign_option, message)
+    if commandSign != commandSign_option:
+        return None
+
+    if command not in command_list:
+        return None
+
+    return commandSign, command, commandData
+
+
+MESSAGES = {
+    "text": "今天晚上吃什么呢 有没有人一起去吃火锅 顺便打会儿游戏 [CQ:face,id=178]" * 2,
+    "command": "#echo 今天晚上吃什么呢 有没有人一起去吃火锅",
+    "not_command": "#nope 今天晚上吃什么呢",
+}
+
+
+def new_route(bot, command_list: dict, message: str):
+    commandIn = bot._set_command_key(message)
+    if commandIn is None or commandIn[1] not in command_list:
+        return None
+
+    return commandIn
+
+
+def run(number: int = 200000) -> None:
+    bot = cqHttpApi().create_bot()
+    command_list = {("command%s" % index): None for index in range(50)}
+    command_list["echo"] = None
+
+    for name, message in MESSAGES.items():
+        old_time = timeit.timeit(lambda: old_route("#", command_list, message), number=number)
+        new_time = timeit.timeit(lambda: new_route(bot, command_list, message), number=number)
+        print("%-12s len=%-4s old: %6.3f us  new: %6.3f us  x%.1f" % (
+            name, len(message), old_time / number * 1e6, new_time / number * 1e6, old_time / new_time
+        ))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,121 @@
+"""
+cqCode 解析性能测试
+
+对比旧的逐字符状态机实现与当前实现在常见消息上的解析耗时
+
+    python benchmark/cqCode_benchmark.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pycqBot.cqCode import DictTocqJsonStr, cqJsonStrToDict, get_cq_code, strToCqCode
+
+
+def old_strToCqCode(message: str) -> list[str]:
+    msg = list(message)
+    cq_code = ""
+    cq_code_in = False
+    cq_code_list = []
+    for str in msg:
+        if cq_code_in and str != "]":
+            cq_code += str
+            continue
+        
+        if cq_code_in and str == "]":
+            cq_code += str
+            cq_code_list.append(cq_code)
+            cq_code = ""
+            cq_code_in = False
+            continue
+
+        if str == "[":
+            cq_code = ""
+            cq_code += str
+            continue
+
+        if str == "C":
+            cq_code += str
+            continue
+
+        if str == "Q":
+            cq_code += str
+            continue
+
+        if str == ":" and cq_code == "[CQ":
+            cq_code += str
+            cq_code_in = True
+
+    return cq_code_list
+
+
+def old_get_cq_code(code_str: str) -> dict:
+    code_str = code_str.lstrip("[CQ:").rsplit("]")[0]
+    code_list = code_str.split(",")
+
+    cq_code = {
+        "type": code_list[0],
+        "data":{
+
+        }
+    }
+
+    if len(code_list) == 1:
+        return cq_code
+
+    for code_data in code_list[1:]:
+        key_data = code_data.split("=")
+        if len(key_data) != 2:
+            key_data[1] = "=".join(key_data[1:])
+        cq_code["data"][key_data[0]] = key_data[1]
+
+    if cq_code["type"] == "json":
+        cq_code["data"]["data"] = cqJsonStrToDict(cq_code["data"]["data"])
+    
+    return cq_code
+
+
+MINI_PROGRAM = {
+    "app": "com.tencent.miniapp_01",
+    "desc": "",
+    "view": "view_8C8E89B49BE609866298ADDFF2DBABA4",
+    "ver": "1.0.0.103",
+    "prompt": "[QQ小程序]【原神】新角色演示",
+    "meta": {
+        "detail_1": {
+            "appid": "1109937557",
+            "desc": "【原神】新角色演示 「寻道」",
+            "icon": "https://open.gtimg.cn/open/app_icon/00/95/17/76/100951776_100_m.png?t=1659061321",
+            "preview": "pubminishare-30161.picsz.qpic.cn/1f8bd1dc-6c8c-4bde-b3a0-1c1b9e1a9f8a",
+            "qqdocurl": "https://b23.tv/abcdefg?share_medium=android&share_source=qq&bbid=XY123&ts=1660000000000",
+            "shareTemplateData": {},
+            "title": "哔哩哔哩",
+            "url": "m.q.qq.com/a/s/0123456789abcdef",
+        }
+    },
+}
+
+CORPUS = {
+    "text": "今天晚上吃什么呢 有没有人一起去吃火锅 顺便打会儿游戏" * 2,
+    "at": "[CQ:at,qq=123456789] 你看看这个 [CQ:face,id=178] 哈哈哈哈",
+    "image": "[CQ:image,file=6f4a2c8f1d7f7e3ee1a3b0e1a1b1c1d1.image,subType=0,url=https://gchat.qpic.cn/gchatpic_new/1/2-3-6F4A2C8F1D7F7E3EE1A3B0E1A1B1C1D1/0?term=2&is_origin=0]",
+    "reply": "[CQ:reply,id=-1946393029][CQ:at,qq=987654321] [CQ:at,qq=987654321] 收到 明天见",
+    "mini_program": "[CQ:json,data=%s]" % DictTocqJsonStr(MINI_PROGRAM),
+}
+
+
+def run(number: int = 20000) -> None:
+    for name, message in CORPUS.items():
+        assert strToCqCode(message) == old_strToCqCode(message), name
+
+        old_time = timeit.timeit(lambda: [old_get_cq_code(code) for code in old_strToCqCode(message)], number=number)
+        new_time = timeit.timeit(lambda: [get_cq_code(code) for code in strToCqCode(message)], number=number)
+        print("%-13s len=%-4s old: %8.2f us  new: %8.2f us  x%.1f" % (
+            name, len(message), old_time / number * 1e6, new_time / number * 1e6, old_time / new_time
+        ))
+
+
+if __name__ == "__main__":
+    run()
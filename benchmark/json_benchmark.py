@@ -0,0 +1,102 @@
+"""
+json 解码性能测试
+
+对比各 json 库解码 go-cqhttp 上报事件的耗时 (未安装的库会跳过)
+
+    python benchmark/json_benchmark.py
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pycqBot import jsonCodec
+from pycqBot.cqCode import DictToCqCode
+from pycqBot.data.event import _get_event
+
+
+HEARTBEAT = {
+    "post_type": "meta_event",
+    "meta_event_type": "heartbeat",
+    "time": 1660000000,
+    "self_id": 123456789,
+    "status": {
+        "app_enabled": True, "app_good": True, "app_initialized": True, "good": True, "online": True, "plugins_good": None,
+        "stat": {
+            "packet_received": 1024, "packet_sent": 998, "packet_lost": 0, "message_received": 512,
+            "message_sent": 128, "disconnect_times": 0, "lost_times": 0, "last_message_time": 1659999990
+        }
+    },
+    "interval": 5000
+}
+
+GROUP_MESSAGE = {
+    "post_type": "message",
+    "message_type": "group",
+    "time": 1660000000,
+    "self_id": 123456789,
+    "sub_type": "normal",
+    "message_id": -1946393029,
+    "user_id": 987654321,
+    "group_id": 111222333,
+    "anonymous": None,
+    "message": "[CQ:at,qq=123456789] 今天晚上吃什么呢 有没有人一起去吃火锅",
+    "raw_message": "[CQ:at,qq=123456789] 今天晚上吃什么呢 有没有人一起去吃火锅",
+    "font": 0,
+    "message_seq": 10086,
+    "sender": {
+        "age": 0, "area": "", "card": "群名片", "level": "", "nickname": "昵称",
+        "role": "member", "sex": "unknown", "title": "", "user_id": 987654321
+    }
+}
+
+MINI_PROGRAM = dict(GROUP_MESSAGE, message=DictToCqCode({
+    "app": "com.tencent.miniapp_01",
+    "desc": "",
+    "view": "view_8C8E89B49BE609866298ADDFF2DBABA4",
+    "ver": "1.0.0.103",
+    "prompt": "[QQ小程序]【原神】新角色演示",
+    "meta": {
+        "detail_1": {
+            "appid": "1109937557",
+            "desc": "【原神】新角色演示 「寻道」",
+            "icon": "https://open.gtimg.cn/open/app_icon/00/95/17/76/100951776_100_m.png?t=1659061321",
+            "preview": "pubminishare-30161.picsz.qpic.cn/1f8bd1dc-6c8c-4bde-b3a0-1c1b9e1a9f8a",
+            "qqdocurl": "https://b23.tv/abcdefg?share_medium=android&share_source=qq&bbid=XY123&ts=1660000000000",
+            "shareTemplateData": {},
+            "title": "哔哩哔哩",
+            "url": "m.q.qq.com/a/s/0123456789abcdef",
+        }
+    },
+}))
+MINI_PROGRAM["raw_message"] = MINI_PROGRAM["message"]
+
+PAYLOAD = {
+    "heartbeat": json.dumps(HEARTBEAT, ensure_ascii=False),
+    "group_message": json.dumps(GROUP_MESSAGE, ensure_ascii=False),
+    "mini_program": json.dumps(MINI_PROGRAM, ensure_ascii=False),
+}
+
+
+def run(number: int = 20000) -> None:
+    for backend in ("json", "ujson", "orjson"):
+        try:
+            jsonCodec.set_json_backend(backend)
+        except ImportError:
+            print("%s 未安装 跳过" % backend)
+            continue
+
+        for name, frame in PAYLOAD.items():
+            decode_time = timeit.timeit(lambda: jsonCodec.loads(frame), number=number)
+            event_time = timeit.timeit(lambda: _get_event(frame), number=number)
+            print("%-7s %-14s len=%-5s loads: %6.2f us  _get_event: %6.2f us" % (
+                backend, name, len(frame), decode_time / number * 1e6, event_time / number * 1e6
+            ))
+
+    jsonCodec.set_json_backend()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,78 @@
+"""
+消息对象内存测试
+
+使用 tracemalloc 统计保留群消息对象时每条消息占用的内存
+
+    python benchmark/message_memory_benchmark.py
+"""
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pycqBot import jsonCodec
+from pycqBot.data.event import _get_event
+
+
+def group_message_frame(index: int) -> str:
+    return json.dumps({
+        "post_type": "message",
+        "message_type": "group",
+        "time": 1660000000 + index,
+        "self_id": 123456789,
+        "sub_type": "normal",
+        "message_id": -1946393029 + index,
+        "user_id": 987654321 + index % 100,
+        "group_id": 111222333,
+        "anonymous": None,
+        "message": "[CQ:at,qq=123456789] 今天晚上吃什么呢 有没有人一起去吃火锅 %s" % index,
+        "raw_message": "[CQ:at,qq=123456789] 今天晚上吃什么呢 有没有人一起去吃火锅 %s" % index,
+        "font": 0,
+        "message_seq": 10086 + index,
+        "sender": {
+            "age": 0, "area": "", "card": "群名片", "level": "", "nickname": "昵称 %s" % index,
+            "role": "member", "sex": "unknown", "title": "", "user_id": 987654321 + index % 100
+        }
+    }, ensure_ascii=False)
+
+
+def measure(frames: list[str], build) -> float:
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    retained = [build(frame) for frame in frames]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del retained
+    return size / len(frames)
+
+
+def message(frame: str, drop_data: bool = False, parse: bool = False):
+    message = _get_event(frame).get_message(None)
+    if parse:
+        message.code, message.sender
+
+    if drop_data:
+        message._drop_data()
+
+    return message
+
+
+def run(number: int = 20000) -> None:
+    # orjson 的部分内存分配 tracemalloc 无法统计
+    jsonCodec.set_json_backend("json")
+    frames = [group_message_frame(index) for index in range(number)]
+    print("json 库: %s  消息数: %s" % (jsonCodec.backend, number))
+    print("%-28s %8.0f bytes" % ("原始 dict", measure(frames, jsonCodec.loads)))
+    print("%-28s %8.0f bytes" % ("Group_Message", measure(frames, message)))
+    print("%-28s %8.0f bytes" % ("Group_Message 已解析", measure(frames, lambda frame: message(frame, parse=True))))
+    print("%-28s %8.0f bytes" % ("Group_Message 丢弃原始数据", measure(frames, lambda frame: message(frame, drop_data=True))))
+    print("%-28s %8.0f bytes" % ("Group_Message 已解析 丢弃原始数据", measure(frames, lambda frame: message(frame, drop_data=True, parse=True))))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,112 @@
+"""
+长效消息存储性能测试
+
+对比旧的每次调用新建连接 / 字符串拼接 SQL / 无索引的实现与 messageStore 的写入与查询速度
+
+旧实现写入过慢, 只写入 OLD_INSERT 条估算单条耗时, 查询在同样 ROWS 条数据的无索引表上进行
+
+    python benchmark/message_store_benchmark.py [ROWS]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pycqBot.messageStore import messageStore
+
+
+ROWS = 1000000
+OLD_INSERT = 2000
+LOOKUP = 2000
+USERS = 10000
+MESSAGE_DATA = str({
+    "post_type": "message", "message_type": "group", "sub_type": "normal", "user_id": 123456,
+    "message": "今天晚上吃什么呢 有没有人一起去吃火锅 [CQ:face,id=178]", "anonymous": None,
+})
+
+
+def old_create(db_path: str) -> None:
+    with sqlite3.connect(db_path) as sql_link:
+        sql_link.execute("""CREATE TABLE `Message` (
+                ID               INTEGER PRIMARY KEY AUTOINCREMENT,
+                userId           NOT NULL,
+                stime            NOT NULL,
+                etime            NOT NULL,
+                messageData JSON NOT NULL
+            );
+        """)
+
+
+def old_insert(db_path: str, user_id: int, time_int: int) -> None:
+    with sqlite3.connect(db_path) as sql_link:
+        sql_link.execute("""
+            INSERT INTO `Message` VALUES (
+                NULL , "%s", "%s", "%s", "%s"
+            )
+        """ % (user_id, time_int, time_int + 3600, MESSAGE_DATA.replace('"', "'")))
+        sql_link.commit()
+
+
+def old_get(db_path: str, user_id: int) -> list:
+    with sqlite3.connect(db_path) as sql_link:
+        return sql_link.execute("SELECT * FROM `Message` WHERE userId = '%s'" % user_id).fetchall()
+
+
+def bulk_old(db_path: str, rows: int) -> None:
+    # 直接批量填充旧表 只用于查询测试
+    time_int = int(time.time())
+    with sqlite3.connect(db_path) as sql_link:
+        sql_link.executemany("INSERT INTO `Message` VALUES (NULL, ?, ?, ?, ?)", (
+            (str(index % USERS), str(time_int), str(time_int + 3600), MESSAGE_DATA) for index in range(rows)
+        ))
+
+
+def run(rows: int = ROWS) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_path = os.path.join(tmp_dir, "old.db")
+        new_path = os.path.join(tmp_dir, "new.db")
+        time_int = int(time.time())
+
+        old_create(old_path)
+        start = time.perf_counter()
+        for index in range(OLD_INSERT):
+            old_insert(old_path, index % USERS, time_int)
+        old_insert_time = (time.perf_counter() - start) / OLD_INSERT
+
+        store = messageStore(new_path)
+        start = time.perf_counter()
+        for index in range(rows):
+            store.add(None, index % USERS, time_int, time_int + 3600, MESSAGE_DATA)
+        store.flush()
+        new_insert_time = (time.perf_counter() - start) / rows
+
+        print("insert  old: %8.1f us/row  new: %6.2f us/row  x%.0f  (%s rows)" % (
+            old_insert_time * 1e6, new_insert_time * 1e6, old_insert_time / new_insert_time, rows
+        ))
+
+        bulk_old(old_path, rows - OLD_INSERT)
+        user_list = [random.randrange(USERS) for _ in range(LOOKUP)]
+
+        start = time.perf_counter()
+        for user_id in user_list[:LOOKUP // 20]:
+            old_get(old_path, user_id)
+        old_get_time = (time.perf_counter() - start) / (LOOKUP // 20)
+
+        start = time.perf_counter()
+        for user_id in user_list:
+            store.get(user_id)
+        new_get_time = (time.perf_counter() - start) / LOOKUP
+
+        print("lookup  old: %8.1f us/op   new: %6.2f us/op   x%.0f  (%s rows, %s rows/user)" % (
+            old_get_time * 1e6, new_get_time * 1e6, old_get_time / new_get_time, rows, rows // USERS
+        ))
+
+        store.close()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else ROWS)
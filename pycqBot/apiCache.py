@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent import futures
+from typing import Any, Awaitable, Callable, Optional
+from threading import Lock
+import asyncio
+import time
+
+
+API_CACHE_TTL: dict[str, float] = {
+    "/get_login_info": 3600,
+    "/get_stranger_info": 600,
+    "/get_friend_list": 300,
+    "/get_group_info": 300,
+    "/get_group_list": 300,
+    "/get_group_member_info": 300,
+    "/get_group_member_list": 300,
+}
+"""默认缓存的 go-cqhttp Api 与缓存时间 单位秒"""
+
+API_CACHE_NOTICE = ("group_card", "group_admin", "group_increase", "group_decrease", "friend_add")
+"""使相关缓存失效的通知类型"""
+
+
+class apiCache:
+    """
+    go-cqhttp 只读 Api 响应缓存
+
+    按 Api 与参数缓存成功的响应, 超过缓存时间或数量超过 max_size 时丢弃最久未使用的响应
+    同时进行的相同请求只发送一次, 参数 no_cache 为 True 时不使用缓存并更新缓存, 可以在任意线程调用
+    返回的响应由所有调用共用, 不要修改
+    """
+
+    def __init__(self, ttl: Optional[dict[str, float]] = None, max_size: int = 1024) -> None:
+        self.ttl = dict(API_CACHE_TTL)
+        """Api -> 缓存时间 单位秒"""
+
+        if ttl is not None:
+            self.ttl.update(ttl)
+
+        # 缓存时间为 0 的 Api 不缓存
+        self.ttl = {api: api_ttl for api, api_ttl in self.ttl.items() if api_ttl > 0}
+
+        self.max_size = max(max_size, 1)
+        """最多缓存的响应数"""
+
+        # (Api, 参数) -> (失效时间, 响应)
+        self._cache: OrderedDict[tuple, tuple[float, dict[str, Any]]] = OrderedDict()
+        # 正在进行的请求 (Api, 参数) -> (Future, 是否为异步请求)
+        self._inflight: dict[tuple, tuple[futures.Future, bool]] = {}
+        self._lock = Lock()
+        # 缓存失效时增加 之前发出的请求的响应不再缓存
+        self._generation = 0
+
+        self.hit_count = 0
+        """命中数"""
+
+        self.miss_count = 0
+        """未命中数"""
+
+        self.shared_count = 0
+        """等待相同请求的次数"""
+
+    def get_status(self) -> dict[str, Any]:
+        """
+        获取缓存状态
+        """
+        return {
+            "size": len(self._cache),
+            "inflight": len(self._inflight),
+            "hit": self.hit_count,
+            "miss": self.miss_count,
+            "shared": self.shared_count,
+        }
+
+    @staticmethod
+    def _get_key(api: str, data: dict[str, Any]) -> tuple:
+        return (api, tuple(sorted((key, value) for key, value in data.items() if key != "no_cache")))
+
+    def _lookup(self, api: str, data: dict[str, Any], is_async: bool) -> tuple[str, Any, tuple, int]:
+        """
+        查找缓存 返回 hit 与响应, wait 与等待的 Future, 或 run 与需要设置结果的 Future
+        """
+        key = self._get_key(api, data)
+        no_cache = data.get("no_cache") is True
+        with self._lock:
+            if not no_cache:
+                item = self._cache.get(key)
+                if item is not None and item[0] > time.time():
+                    self._cache.move_to_end(key)
+                    self.hit_count += 1
+                    return "hit", item[1], key, self._generation
+
+                inflight = self._inflight.get(key)
+                # 同步请求等待异步请求可能阻塞异步请求所在的事件循环
+                if inflight is not None and (is_async or not inflight[1]):
+                    self.shared_count += 1
+                    return "wait", inflight[0], key, self._generation
+
+            self.miss_count += 1
+            future: futures.Future = futures.Future()
+            if key not in self._inflight:
+                self._inflight[key] = (future, is_async)
+
+            return "run", future, key, self._generation
+
+    def _store(self, api: str, key: tuple, future: futures.Future, generation: int, json: Optional[dict[str, Any]]) -> None:
+        with self._lock:
+            inflight = self._inflight.get(key)
+            if inflight is not None and inflight[0] is future:
+                del self._inflight[key]
+
+            if json is not None and json.get("retcode") == 0 and generation == self._generation:
+                self._cache[key] = (time.time() + self.ttl[api], json)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+
+        future.set_result(json)
+
+    def get(self, api: str, data: dict[str, Any], link: Callable[[], Optional[dict[str, Any]]]) -> Optional[dict[str, Any]]:
+        """
+        获取响应 没有缓存时调用 link 请求
+        """
+        state, value, key, generation = self._lookup(api, data, False)
+        if state == "hit":
+            return value
+
+        if state == "wait":
+            return value.result()
+
+        json = None
+        try:
+            json = link()
+        finally:
+            self._store(api, key, value, generation, json)
+
+        return json
+
+    async def async_get(self, api: str, data: dict[str, Any], link: Callable[[], Awaitable[Optional[dict[str, Any]]]]) -> Optional[dict[str, Any]]:
+        """
+        获取响应 (异步) 没有缓存时调用 link 请求
+        """
+        state, value, key, generation = self._lookup(api, data, True)
+        if state == "hit":
+            return value
+
+        if state == "wait":
+            return await asyncio.wrap_future(value)
+
+        json = None
+        try:
+            json = await link()
+        finally:
+            self._store(api, key, value, generation, json)
+
+        return json
+
+    def invalidate(self, group_id: Optional[int] = None, user_id: Optional[int] = None) -> None:
+        """
+        使缓存失效
+
+        指定 group_id 时删除该群 (与群列表) 的缓存, 同时指定 user_id 时群成员信息只删除该成员的缓存
+        只指定 user_id 时删除该用户 (与好友列表) 的缓存, 都不指定时清空缓存
+        """
+        with self._lock:
+            self._generation += 1
+            if group_id is None and user_id is None:
+                self._cache.clear()
+                return
+
+            for key in list(self._cache):
+                api, data = key[0], dict(key[1])
+                if group_id is not None:
+                    drop = api == "/get_group_list" or (data.get("group_id") == group_id and (
+                        api != "/get_group_member_info" or user_id is None or data.get("user_id") == user_id
+                    ))
+                else:
+                    drop = api == "/get_friend_list" or data.get("user_id") == user_id
+
+                if drop:
+                    del self._cache[key]
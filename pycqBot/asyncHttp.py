@@ -1,21 +1,51 @@
-from typing import Any, Coroutine, Optional
+from typing import Any, Coroutine, Optional, Union
 import logging
 from threading import Thread
+from concurrent import futures
+from contextvars import ContextVar
 import asyncio
+import itertools
 import aiohttp
 import aiofiles
 import os
 
 import requests
+import requests.adapters
+
+from pycqBot import jsonCodec
+from pycqBot.apiCache import apiCache
+from pycqBot.sendQueue import SEND_API, send_priority, sendQueue
+
+
+# 不为 None 时 add / _link 只记录 go-cqhttp Api 请求 (api, data) 不发送, 用于生成 AsyncApi
+_link_capture: ContextVar[Optional[list[tuple[str, dict[str, Any]]]]] = ContextVar("_link_capture", default=None)
+
 
 class asyncHttp:
 
-    def __init__(self, download_path: str="./download", chunk_size: int=1024) -> None:
+    def __init__(self, download_path: str="./download", chunk_size: int=1024, pool_size: int=10, timeout: Union[float, tuple[float, float], None]=(5, 60), transport: str="http") -> None:
         self._loop = asyncio.new_event_loop()
         self._session = aiohttp.ClientSession(loop=self._loop)
+        # 同步 Api 请求复用连接
+        self._link_session = requests.Session()
+        self._link_timeout = timeout
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._link_session.mount("http://", adapter)
+        self._link_session.mount("https://", adapter)
         self._download_path = download_path
         self.chunk_size = chunk_size
         self.http = ""
+        # go-cqhttp Api 请求方式 http / websocket (通过 bot 的 websocket 会话发送, 未连接时使用 http)
+        self.transport = transport
+        self._websocket: Any = None
+        self._websocket_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._websocket_timeout: Optional[float] = timeout[1] if type(timeout) is tuple else timeout
+        self._websocket_echo: dict[str, futures.Future] = {}
+        self._websocket_echo_id = itertools.count()
+        # 消息发送队列 通过 set_send_queue 启用
+        self.send_queue: Optional[sendQueue] = None
+        # 只读 Api 响应缓存 通过 set_api_cache 启用
+        self.api_cache: Optional[apiCache] = None
 
         if not os.path.isdir(download_path):
             os.makedirs(download_path)
@@ -37,11 +67,121 @@ class asyncHttp:
         except Exception as err:
             self.downloadFileRunError(err)
     
+    def _set_websocket(self, websocket: Any, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """
+        设置 bot 的 websocket 会话 断开时设置为 None
+        """
+        self._websocket = websocket
+        self._websocket_loop = loop
+        if websocket is not None:
+            return
+
+        echo_list, self._websocket_echo = self._websocket_echo, {}
+        for future in echo_list.values():
+            if not future.done():
+                future.set_exception(ConnectionError("websocket 会话已断开"))
+
+    def _use_websocket(self) -> bool:
+        if self.transport != "websocket" or self._websocket is None:
+            return False
+
+        try:
+            # 在 websocket 事件循环中同步等待响应会阻塞响应的读取
+            return asyncio.get_running_loop() is not self._websocket_loop
+        except RuntimeError:
+            return True
+
+    def _websocket_link(self, api: str, data: dict[str, Any]) -> tuple[str, futures.Future]:
+        """
+        通过 websocket 发送 go-cqhttp Api 请求 返回 echo 与等待响应的 Future
+        """
+        echo = str(next(self._websocket_echo_id))
+        future: futures.Future = futures.Future()
+        self._websocket_echo[echo] = future
+
+        def send_done(send_future: futures.Future) -> None:
+            err = send_future.exception()
+            if err is not None and self._websocket_echo.pop(echo, None) is not None:
+                future.set_exception(err)
+
+        send = None
+        try:
+            frame = jsonCodec.dumps({"action": api.lstrip("/"), "params": data, "echo": echo})
+            send = self._websocket.send(frame)
+            send_future = asyncio.run_coroutine_threadsafe(send, self._websocket_loop)
+        except Exception:
+            # websocket 在检查后断开 (_websocket 为 None 或事件循环已关闭) 时不会收到响应
+            self._websocket_echo.pop(echo, None)
+            if send is not None:
+                send.close()
+            raise
+
+        send_future.add_done_callback(send_done)
+
+        return echo, future
+
+    def _websocket_response(self, response: dict[str, Any]) -> None:
+        """
+        websocket Api 响应 通过 echo 唤醒等待的请求
+        """
+        future = self._websocket_echo.pop(str(response["echo"]), None)
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    async def _websocket_asynclink(self, api: str, data: dict[str, Any]) -> Optional[dict]:
+        echo = None
+        try:
+            echo, future = self._websocket_link(api, data)
+            return await asyncio.wait_for(asyncio.wrap_future(future), self._websocket_timeout)
+        except Exception as err:
+            self.apiLinkRunError(err)
+            return None
+        finally:
+            if echo is not None:
+                self._websocket_echo.pop(echo, None)
+
+    def set_send_queue(self,
+            rate: float = 5,
+            burst: int = 5,
+            target_rate: float = 1,
+            target_burst: int = 3,
+            max_size: int = 1000,
+            merge: bool = False,
+            merge_max_length: int = 1000
+        ) -> sendQueue:
+        """
+        启用消息发送队列 限制发送速度避免被风控
+        """
+        self.send_queue = sendQueue(self._api_asynclink, rate, burst, target_rate, target_burst, 
+            max_size, merge, merge_max_length, self.sendQueueDropError)
+
+        return self.send_queue
+
+    def set_api_cache(self, ttl: Optional[dict[str, float]] = None, max_size: int = 1024) -> apiCache:
+        """
+        启用只读 Api 响应缓存 ttl 为 Api -> 缓存时间, 与默认设置合并
+        """
+        self.api_cache = apiCache(ttl, max_size)
+        return self.api_cache
+
     async def _asynclink(self, api: str, data: dict=None) -> Optional[dict]:
         if data is None:
             data = {}
 
-        json = await self.link("%s%s" % (self.http, api), mod="post", data=data)
+        if self.send_queue is not None and api in SEND_API:
+            return await self.send_queue.send(api, data, send_priority.get())
+
+        if self.api_cache is not None and api in self.api_cache.ttl:
+            return await self.api_cache.async_get(api, data, lambda: self._api_asynclink(api, data))
+
+        return await self._api_asynclink(api, data)
+
+    async def _api_asynclink(self, api: str, data: dict[str, Any]) -> Optional[dict]:
+        if self._use_websocket():
+            json = await self._websocket_asynclink(api, data)
+        else:
+            json = await self.link("%s%s" % (self.http, api), mod="post", data=data)
+
         if json == {} or json is None:
             logging.warning("cqAPI 响应: None / {}")
             return None
@@ -67,14 +207,14 @@ class asyncHttp:
             if mod == "get":
                 async with self._session.get(url, data=data, allow_redirects=allow_redirects, proxy=proxy, headers=headers) as req:
                     if json:
-                        http_data = await req.json(encoding=encoding)
+                        http_data = await req.json(encoding=encoding, loads=jsonCodec.loads)
                     else:
                         http_data = await req.text(encoding=encoding)
             
             if mod == "post":
                 async with self._session.post(url, data=data, allow_redirects=allow_redirects, proxy=proxy, headers=headers) as req:
                     if json:
-                        http_data = await req.json(encoding=encoding)
+                        http_data = await req.json(encoding=encoding, loads=jsonCodec.loads)
                     else:
                         http_data = await req.text(encoding=encoding)
             
@@ -85,14 +225,33 @@ class asyncHttp:
             return None
         
     def _link(self, api: str, data: dict[str, Any]={}) -> Optional[dict[Any, Any]]:
+        capture = _link_capture.get()
+        if capture is not None:
+            capture.append((api, data))
+            return None
+
+        if self.api_cache is not None and api in self.api_cache.ttl:
+            return self.api_cache.get(api, data, lambda: self._api_link(api, data))
+
+        return self._api_link(api, data)
+
+    def _api_link(self, api: str, data: dict[str, Any]) -> Optional[dict[Any, Any]]:
         try:
-            with requests.post(f"{self.http}{api}", data=data) as req:
-                json =  req.json()
-                logging.debug("cqAPI 响应: %s" % json)
-                if json["retcode"] != 0:
-                    self.apiLinkError(json)
-                    
-                return json
+            if self._use_websocket():
+                echo, future = self._websocket_link(api, data)
+                try:
+                    json = future.result(self._websocket_timeout)
+                finally:
+                    self._websocket_echo.pop(echo, None)
+            else:
+                with self._link_session.post(f"{self.http}{api}", data=data, timeout=self._link_timeout) as req:
+                    json = jsonCodec.loads(req.content)
+
+            logging.debug("cqAPI 响应: %s" % json)
+            if json["retcode"] != 0:
+                self.apiLinkError(json)
+
+            return json
             
         except Exception as err:
             self.apiLinkRunError(err)
@@ -108,6 +267,11 @@ class asyncHttp:
         if data is None:
             data = {}
 
+        capture = _link_capture.get()
+        if capture is not None:
+            capture.append((api, data))
+            return
+
         asyncio.run_coroutine_threadsafe(self._asynclink(api, data), self._loop)
 
     def download_path(self, download_path: str) -> None:
@@ -168,6 +332,12 @@ class asyncHttp:
         """
         logging.error("api 发生错误 %s: %s code: %s" % (err_json["msg"], err_json["wording"], err_json["retcode"]))
     
+    def sendQueueDropError(self, api: str, data: dict[str, Any]) -> None:
+        """
+        发送队列已满 消息被丢弃
+        """
+        logging.warning("发送队列已满 丢弃消息 %s: %s" % (api, data))
+
     def apiLinkRunError(self, err: Exception) -> None:
         """
         cqapi请求时发生错误
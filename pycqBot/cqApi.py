@@ -1,6 +1,10 @@
 from array import array
-from typing import Optional, Union
-from pycqBot.asyncHttp import asyncHttp
+from typing import Any, Coroutine, Optional, Union
+import asyncio
+import functools
+import inspect
+from pycqBot.asyncHttp import asyncHttp, _link_capture
+from pycqBot.sendQueue import SEND_PRIORITY_REPLY, set_send_priority
 from pycqBot.data.message import *
 
 
@@ -404,11 +408,12 @@ class Api(asyncHttp):
             `messages`: 要发送的内容
             `auto_escape`: 消息内容是否作为纯文本发送 ( 即不解析 CQ 码 )
         """
-        if type(from_message) is Group_Message:
-            self.send_group_msg(from_message.group_id, message, auto_escape)
+        with set_send_priority(SEND_PRIORITY_REPLY):
+            if type(from_message) is Group_Message:
+                self.send_group_msg(from_message.group_id, message, auto_escape)
 
-        if type(from_message) is Private_Message:
-            self.send_private_msg(from_message.sender.id, message, auto_escape)
+            if type(from_message) is Private_Message:
+                self.send_private_msg(from_message.user_id, message, auto_escape)
 
     def send_forward_msg(
         self,
@@ -426,7 +431,7 @@ class Api(asyncHttp):
             self.send_group_forward_msg(from_message.group_id, message)
 
         if type(from_message) is Private_Message:
-            self.send_private_forward_msg(from_message.sender.id, message)
+            self.send_private_forward_msg(from_message.user_id, message)
 
     def get_image(
         self,
@@ -1627,3 +1632,75 @@ class Api(asyncHttp):
             "context": context,
             "operation": operation
         })
+
+
+class AsyncApi:
+    """
+    go-cqhttp v1.0.0 异步 Api
+
+    由 Api 生成, 参数与 Api 一致, 所有 Api 都是返回 go-cqhttp 响应的协程
+
+    https://docs.go-cqhttp.org/api/
+    """
+
+    def __init__(self, cqapi: Api) -> None:
+        self._cqapi = cqapi
+
+    async def _run(self, coroutine: Coroutine) -> Any:
+        """
+        在 cqapi 事件循环中运行协程并等待结果 请求使用的 aiohttp 会话绑定在 cqapi 事件循环
+        """
+        if asyncio.get_running_loop() is self._cqapi._loop:
+            return await coroutine
+
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, self._cqapi._loop))
+
+    async def cqhttp_download_file(
+        self,
+        url: str,
+        headers,
+        thread_count: int
+    ):
+        """
+        go-cqhttp 的内置下载
+
+        Returns:
+            下载文件的绝对路径
+        """
+        return await self._run(self._cqapi._cqhttp_download_file(url, headers, thread_count))
+
+
+def _set_async_api(name: str) -> None:
+    function = getattr(Api, name)
+
+    @functools.wraps(function)
+    async def async_api(self: AsyncApi, *args, **kwargs):
+        # 运行同步 Api 记录请求, 再异步发送
+        link_list: list[tuple[str, dict[str, Any]]] = []
+        token = _link_capture.set(link_list)
+        try:
+            result = getattr(self._cqapi, name)(*args, **kwargs)
+        finally:
+            _link_capture.reset(token)
+
+        if not link_list:
+            # 没有请求 go-cqhttp (如从缓存获取)
+            return result
+
+        async def link_all() -> list[Optional[dict[str, Any]]]:
+            return await asyncio.gather(*(self._cqapi._asynclink(api, data) for api, data in link_list))
+
+        json_list = await self._run(link_all())
+        return json_list[0] if len(json_list) == 1 else json_list
+
+    setattr(AsyncApi, name, async_api)
+
+
+for _name, _function in list(Api.__dict__.items()):
+    if _name.startswith("__") or _name in AsyncApi.__dict__:
+        continue
+
+    if not inspect.isfunction(_function) or asyncio.iscoroutinefunction(_function):
+        continue
+
+    _set_async_api(_name)
@@ -1,57 +1,54 @@
 from typing import Any, Union, Optional
 from time import time
-import json as json_data
+import re
 
+from pycqBot import jsonCodec
 
-def strToCqCode(message: str) -> list[str]:
+
+# cqCode 中的 ] 会被转义为 &#93; 因此到第一个 ] 为止
+_CQ_CODE_RE = re.compile(r"\[CQ:([^,\]]*)(?:,([^\]]*))?\]")
+
+
+def strToCqCodeSegment(message: str) -> list[tuple[str, str, int, int]]:
     """
-    提取字符串中的 cqCode 字符串
+    将字符串拆分为文本与 cqCode 片段
+
+    返回 (片段类型 text / code, 片段字符串, 开始位置, 结束位置) 列表
     """
-    msg = list(message)
-    cq_code = ""
-    cq_code_in = False
-    cq_code_list = []
-    for str in msg:
-        if cq_code_in and str != "]":
-            cq_code += str
-            continue
-        
-        if cq_code_in and str == "]":
-            cq_code += str
-            cq_code_list.append(cq_code)
-            cq_code = ""
-            cq_code_in = False
-            continue
+    segment_list = []
+    index = 0
+    for match in _CQ_CODE_RE.finditer(message):
+        start, end = match.span()
+        if start > index:
+            segment_list.append(("text", message[index:start], index, start))
 
-        if str == "[":
-            cq_code = ""
-            cq_code += str
-            continue
+        segment_list.append(("code", match.group(0), start, end))
+        index = end
 
-        if str == "C":
-            cq_code += str
-            continue
+    if index < len(message):
+        segment_list.append(("text", message[index:], index, len(message)))
+
+    return segment_list
 
-        if str == "Q":
-            cq_code += str
-            continue
 
-        if str == ":" and cq_code == "[CQ":
-            cq_code += str
-            cq_code_in = True
+def strToCqCode(message: str) -> list[str]:
+    """
+    提取字符串中的 cqCode 字符串
+    """
+    if "[CQ:" not in message:
+        return []
 
-    return cq_code_list
+    return [match.group(0) for match in _CQ_CODE_RE.finditer(message)]
 
 
 def strToCqCodeToDict(message: str) -> list[dict[str, Union[str, dict[str, Any]]]]:
     """
     提取字符串中的 cqCode 字符串转换为字典
     """
-    CqCodeList = []
-    for item in strToCqCode(message):
-        CqCodeList.append(get_cq_code(item))
-    
-    return CqCodeList
+    if "[CQ:" not in message:
+        return []
+
+    return [_cq_code_dict(match.group(1), match.group(2)) for match in _CQ_CODE_RE.finditer(message)]
 
 
 def set_cq_code(code: dict[str, Any]) -> str:
@@ -69,35 +66,43 @@ def set_cq_code(code: dict[str, Any]) -> str:
     return cqCode
 
 
-def get_cq_code(code_str: str) -> dict:
-    """
-    转换 cqCode 字符串为字典
-    """
-    code_str = code_str.lstrip("[CQ:").rsplit("]")[0]
-    code_list = code_str.split(",")
-
+def _cq_code_dict(code_type: str, code_data: Optional[str]) -> dict[str, Any]:
     cq_code: dict[str, Any] = {
-        "type": code_list[0],
+        "type": code_type,
         "data":{
 
         }
     }
 
-    if len(code_list) == 1:
+    if not code_data:
         return cq_code
 
-    for code_data in code_list[1:]:
-        key_data = code_data.split("=")
-        if len(key_data) != 2:
-            key_data[1] = "=".join(key_data[1:])
-        cq_code["data"][key_data[0]] = key_data[1]
+    for code_data_item in code_data.split(","):
+        key, _, data = code_data_item.partition("=")
+        cq_code["data"][key] = data
 
-    if cq_code["type"] == "json":
+    if code_type == "json" and "data" in cq_code["data"]:
         cq_code["data"]["data"] = cqJsonStrToDict(cq_code["data"]["data"])
     
     return cq_code
 
 
+def get_cq_code(code_str: str) -> dict:
+    """
+    转换 cqCode 字符串为字典
+    """
+    match = _CQ_CODE_RE.match(code_str)
+    if match is not None:
+        return _cq_code_dict(match.group(1), match.group(2))
+
+    # 不完整的 cqCode 字符串
+    if code_str.startswith("[CQ:"):
+        code_str = code_str[4:]
+
+    code_type, _, code_data = code_str.split("]", maxsplit=1)[0].partition(",")
+    return _cq_code_dict(code_type, code_data)
+
+
 def e_code(data: str):
     data = data.replace("&", "&amp;")
     data = data.replace(",", "&#44;")
@@ -118,14 +123,14 @@ def cqJsonStrToDict(cq_json_str: str) -> dict[str, Any]:
     """
     转换 cqCode 中的 json 字符串为字典
     """
-    return json_data.loads(d_code(cq_json_str))
+    return jsonCodec.loads(d_code(cq_json_str))
 
 
 def DictTocqJsonStr(dict: dict[str, Any]) -> str:
     """
     转换字典为 cqCode 中的 json 字符串
     """
-    return e_code(json_data.dumps(dict, separators=(',', ':'),ensure_ascii=False)).replace("'", '"')
+    return e_code(jsonCodec.dumps(dict)).replace("'", '"')
 
 
 def DictToCqCode(dict: dict) -> str:
@@ -155,7 +160,7 @@ def node_list(message_list: list[str], name: str, uin: int) -> str:
     for message in message_list:
         node_list_data.append(node(content=message, name=name, uin=uin))
     
-    return json_data.dumps(node_list_data, separators=(',', ':'), ensure_ascii=False)
+    return jsonCodec.dumps(node_list_data)
 
 
 def face(
@@ -453,4 +453,7 @@ class Event:
         """
         接收到 at
         """
-        pass
\ No newline at end of file
+        pass
+
+# 所有可被 bot 与插件重写的事件函数名
+EVENT_HANDLER = [name for name, value in Event.__dict__.items() if callable(value) and not name.startswith("_")]
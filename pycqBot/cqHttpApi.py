@@ -1,34 +1,54 @@
 import asyncio
+from concurrent import futures
 from concurrent.futures import ThreadPoolExecutor
+import functools
 import importlib
 import platform
+import random
 import subprocess
-from typing import Union, Optional, Any, Callable
+import sys
+from typing import Union, Optional, Any, Callable, Coroutine
 import os
 from logging import handlers
 import logging
-from threading import Thread
+from threading import Event as ThreadEvent, Thread, Lock
 import time
-import sqlite3
-from websockets.exceptions import ConnectionClosedError
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
 import websockets
 
 import pycqBot
-from pycqBot import cqEvent
-from pycqBot.cqApi import Api
+from pycqBot import cqEvent, jsonCodec
+from pycqBot.apiCache import API_CACHE_NOTICE
+from pycqBot.cqApi import Api, AsyncApi
 from pycqBot.data import *
 from pycqBot.data.event import _get_event
+from pycqBot.eventQueue import eventQueue
+from pycqBot.messageCache import messageCache
+from pycqBot.messageStore import messageStore
+from pycqBot.sendQueue import SEND_PRIORITY_BROADCAST, set_send_priority
+from pycqBot.timingScheduler import atTrigger, cronTrigger, intervalTrigger, timingScheduler
 import yaml
 
 
 class cqHttpApi(Api):
 
-    def __init__(self, host: str="http://127.0.0.1:5700", download_path: str="./download", chunk_size: int=1024) -> None:
-        super().__init__(download_path, chunk_size)
+    def __init__(self, host: str="http://127.0.0.1:5700", download_path: str="./download", chunk_size: int=1024, pool_size: int=10, timeout: Union[float, tuple[float, float], None]=(5, 60), transport: str="http") -> None:
+        super().__init__(download_path, chunk_size, pool_size, timeout, transport)
         self.http = host
-        self.__reply_list_msg: dict[int, Optional[Message]] = {}
+        self.__reply_waiter: dict[int, list[tuple[Optional[int], futures.Future]]] = {}
+        self.__reply_lock = Lock()
         self.thread_count = 4
         self.bot_qq = 0
+        # 异步 Api
+        self.async_api = AsyncApi(self)
+        # 最近消息缓存 bot 启动时创建
+        self.message_cache: Optional[messageCache] = None
+        # 长效消息存储 启用时创建
+        self.message_store: Optional[messageStore] = None
+        self._record_message_ck_in = False
+        # 下次检查失效消息的时间 更早失效的消息写入时提前检查
+        self._record_message_ck_time = 0.0
+        self._record_message_ck_wakeup = ThreadEvent()
 
     def create_bot(self, host: str="ws://127.0.0.1:8080", group_id_list: list[int]=[], user_id_list: list[int]=[], options: dict[str, Any]={}) -> "cqBot":
         """
@@ -38,30 +58,30 @@ class cqHttpApi(Api):
             self, host, group_id_list, user_id_list, options
         )
     
-    def _create_sql_link(self, db_path: str, sleep: int) -> None:
+    def _create_sql_link(self, db_path: str, sleep: int, persist: bool = False) -> None:
         """
         长效消息存储 初始化
+
+        已初始化时不会重新创建 (websocket 重新连接), persist 为 True 时保留数据库中未失效的消息
         """
         db_path = os.path.join(db_path, "bot_sql.db")
+        if self.message_store is not None and not self.message_store.closed:
+            if self._db_path == db_path:
+                return
+
+            self.message_store.close()
+
         self._db_path = db_path
+        if not persist:
+            for path in (db_path, "%s-wal" % db_path, "%s-shm" % db_path):
+                if os.path.isfile(path):
+                    os.remove(path)
 
-        if os.path.isfile(db_path):
-            os.remove(db_path)
-
-        with sqlite3.connect(self._db_path) as sql_link:
-            sql_cursor = sql_link.cursor()
-            # 初始化 Message 表
-            sql_cursor.execute("""CREATE TABLE `Message` (
-                    ID               INTEGER PRIMARY KEY AUTOINCREMENT,
-                    userId           NOT NULL,
-                    stime            NOT NULL,
-                    etime            NOT NULL,
-                    messageData JSON NOT NULL
-                );
-            """)
-
-            sql_link.commit()
-        
+        self.message_store = messageStore(db_path, error_callback=self.recordMessageError)
+        if self._record_message_ck_in:
+            return
+
+        self._record_message_ck_in = True
         thread = Thread(target=self._record_message_ck, args=(sleep,),name="_record_message_ck")
         thread.setDaemon(True)
         thread.start()
@@ -71,18 +91,22 @@ class cqHttpApi(Api):
         长效消息存储 检查失效消息
         """
         while True:
+            next_expire = None
             try:
-                with sqlite3.connect(self._db_path) as sql_link:
-                    sql_cursor = sql_link.cursor()
-                    data_list = sql_cursor.execute("SELECT * FROM `Message` WHERE etime < '%s'" % int(time.time()))
-                    for data in data_list:
-                        sql_cursor.execute("DELETE from `Message` where ID = '%s'" % data[0])
-                        self.recordMessageInvalid(data, sql_link)
+                message_store = self.message_store
+                data_list = message_store.expire(int(time.time()))
+                if data_list:
+                    self.recordMessageInvalid(data_list, message_store)
 
+                next_expire = message_store.next_expire()
             except Exception as err:
                 self.recordMessageCKError(err)
 
-            time.sleep(sleep)
+            # 下一条消息失效前不检查, 最长间隔 sleep 秒
+            wait = sleep if next_expire is None else min(max(next_expire + 1 - time.time(), 1), sleep)
+            self._record_message_ck_time = time.time() + wait
+            self._record_message_ck_wakeup.wait(wait)
+            self._record_message_ck_wakeup.clear()
 
     def record_message(self, message: Message, time_end: int) -> None:
         """
@@ -91,14 +115,9 @@ class cqHttpApi(Api):
         time_int = int(time.time())
         time_end = time_int + time_end
         try:
-            with sqlite3.connect(self._db_path) as sql_link:
-                sql_cursor = sql_link.cursor()
-                sql_cursor.execute("""
-                    INSERT INTO `Message` VALUES (
-                        NULL , "%s", "%s", "%s", "%s" 
-                    )
-                """ % (message.sender.id, time_int, time_end, message._message_data))
-                sql_link.commit()
+            self.message_store.add(message, message.user_id, time_int, time_end, str(message._get_message_data()))
+            if time_end + 1 < self._record_message_ck_time:
+                self._record_message_ck_wakeup.set()
         except Exception as err:
             self.recordMessageError(message, time_int, time_end, err)
     
@@ -107,57 +126,137 @@ class cqHttpApi(Api):
         长效消息存储 获取
         """
         try:
-            with sqlite3.connect(self._db_path) as sql_link:
-                sql_cursor = sql_link.cursor()
-                data_cursor = sql_cursor.execute("SELECT * FROM `Message` WHERE userId = '%s'" % user_id)
-
-                data_list = data_cursor.fetchall()
-                return data_list
-
+            return self.message_store.get(user_id)
         except Exception as err:
             self.recordMessageGetError(user_id, err)
         
         return None
 
-    def reply(self, user_id, sleep) -> Optional[Message]:
+    def get_msg(self, message_id: int):
+        """
+        获取消息 优先从最近消息缓存中获取
+
+        只在缓存中没有该消息时请求 go-cqhttp, 消息事件不包含 real_id 时使用 message_id
+
+        Args:
+            `message_id`: 消息id
+
+        go-cqhttp 文档:
+        https://docs.go-cqhttp.org/api/#%E8%8E%B7%E5%8F%96%E6%B6%88%E6%81%AF
+        """
+        message = self.get_cache_message(message_id)
+        if message is None:
+            return super().get_msg(message_id)
+
+        group_id = getattr(message, "group_id", None)
+        data = {
+            "group": group_id is not None,
+            "message_id": message.id,
+            "real_id": message.real_id if message.real_id is not None else message.id,
+            "message_type": message.event.message_type,
+            "sender": message._sender_data,
+            "time": message.time,
+            "message": message.message,
+            "raw_message": message.raw_message,
+        }
+        if group_id is not None:
+            data["group_id"] = group_id
+
+        return {"status": "ok", "retcode": 0, "data": data}
+
+    def get_cache_message(self, message_id: Union[int, str]) -> Optional[Message]:
+        """
+        从最近消息缓存中获取消息对象 没有缓存时返回 None
+
+        message_id 可以是 cqCode 中的字符串 id (如 reply 的 id)
+        """
+        if self.message_cache is None:
+            return None
+
+        try:
+            message_id = int(message_id)
+        except (TypeError, ValueError):
+            return None
+
+        return self.message_cache.get(message_id)
+
+    def reply(self, user_id: int, sleep: int, group_id: Optional[int] = None) -> Optional[Message]:
         """
         等待回复
         """
-        in_time =  time.time()
-        sleep += in_time
-        self.__reply_list_msg[user_id] = None
-        while in_time < sleep:
-            in_time = time.time()
-            if self.__reply_list_msg[user_id] is None:
-                continue
-            
-            break
-        
-        reply_msg = self.__reply_list_msg[user_id]
-        self.__reply_list_msg.pop(user_id)
+        future = self._reply_wait(user_id, group_id)
+        try:
+            return future.result(sleep)
+        except futures.TimeoutError:
+            return None
+        finally:
+            self._reply_remove(user_id, group_id, future)
 
-        return reply_msg
+    async def async_reply(self, user_id: int, sleep: int, group_id: Optional[int] = None) -> Optional[Message]:
+        """
+        等待回复 (异步)
+        """
+        future = self._reply_wait(user_id, group_id)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), sleep)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._reply_remove(user_id, group_id, future)
+
+    def _reply_wait(self, user_id: int, group_id: Optional[int]) -> futures.Future:
+        """
+        等待回复 添加等待
+
+        group_id 为 None 时接收该用户在任意位置的回复
+        """
+        future: futures.Future = futures.Future()
+        with self.__reply_lock:
+            self.__reply_waiter.setdefault(user_id, []).append((group_id, future))
+
+        return future
+
+    def _reply_remove(self, user_id: int, group_id: Optional[int], future: futures.Future) -> None:
+        """
+        等待回复 移除等待
+        """
+        with self.__reply_lock:
+            waiter_list = self.__reply_waiter.get(user_id)
+            if waiter_list is None or (group_id, future) not in waiter_list:
+                return
+
+            waiter_list.remove((group_id, future))
+            if not waiter_list:
+                del self.__reply_waiter[user_id]
     
     def _reply_ck(self, user_id: int) -> bool:
         """
         等待回复 检查
         """
-        if user_id in self.__reply_list_msg:
-            return True
-        
-        return False
+        return user_id in self.__reply_waiter
     
     def _reply_add(self, user_id: int, msg: Message) -> None:
         """
-        等待回复 添加回复数据
+        等待回复 添加回复数据 唤醒等待该回复的所有等待
         """
-        self.__reply_list_msg[user_id] = msg
+        msg_group_id = getattr(msg, "group_id", None)
+        with self.__reply_lock:
+            waiter_list = self.__reply_waiter.pop(user_id, [])
+            wait_list = [waiter for waiter in waiter_list if waiter[0] is not None and waiter[0] != msg_group_id]
+            if wait_list:
+                self.__reply_waiter[user_id] = wait_list
+
+        for group_id, future in waiter_list:
+            if (group_id is None or group_id == msg_group_id) and not future.done():
+                future.set_result(msg)
     
-    def recordMessageInvalid(self, record_message_data, sql_link):
+    def recordMessageInvalid(self, record_message_list, message_store):
         """
-        长效消息存储 消息失效
+        长效消息存储 消息失效 每次检查失效的消息一起传入
+
+        需要访问数据库时使用 message_store.execute
         """
-        logging.debug("长效消息存储 消息失效 %s" % str(record_message_data))
+        logging.debug("长效消息存储 %s 条消息失效" % len(record_message_list))
     
     def recordMessageError(self, message_data, time_int, time_end, err):
         """
@@ -189,28 +288,81 @@ class cqBot(cqEvent.Event):
 
         self.cqapi = cqapi
         self.__plugin_list: list[object] = []
+        # 事件分发表
+        self.__event_handlers: Optional[dict[str, list[Callable]]] = None
         # 指令列表
         self.__commandList: dict[str, dict] = {}
+        # 指令帮助文本 id(指令设置) -> 指令设置, 同一指令的多个指令名只记录一次
+        self.__command_help: dict[int, dict] = {}
+        # 帮助信息缓存 (message_type, admin, page, helpPageSize, 指令标志符) -> 帮助信息, 添加删除指令时清空
+        self.__help_text_cache: dict[tuple[Optional[str], bool, int, int, str], str] = {}
+        self.__help_text_format: str = ""
+        # 指令标志符缓存 (生成时 commandSign 的副本, 按长度从长到短排列的标志符)
+        self.__command_sign: tuple[Union[str, list[str], None], tuple[str, ...]] = (None, ())
         # 定时任务
         self.__timingList: dict[str, dict] = {}
         # bot qq
         self.__bot_qq: int= 0
+        # 消息事件过滤集合 由 reload_filter 生成, 重新设置过滤列表时清空
+        self.__event_filter: Optional[tuple[set[int], set[int], set[int], set[int]]] = None
         # 需处理群
         self.group_id_list: list[int] = group_id_list
         # 需处理私信
         self.user_id_list: list[int] = user_id_list
+        # 屏蔽群列表
+        self.groupBanList: list[int] = []
+        # 屏蔽用户列表
+        self.userBanList: list[int] = []
+        # 各过滤阶段丢弃的消息事件数
+        self.event_filter_drop: dict[str, int] = {
+            "userBanList": 0,
+            "groupBanList": 0,
+            "group_id_list": 0,
+            "user_id_list": 0,
+        }
+        # 消息对象创建后丢弃原始消息数据 节省内存
+        self.dropMessageData: bool = False
         # 管理员列表
         self.admin: list[int] = []
-        # 指令标志符
-        self.commandSign: str = "#"
+        # 指令标志符 多个标志符时使用列表
+        self.commandSign: Union[str, list[str]] = "#"
         # 帮助信息模版
         self.help_text_format: str = "本bot帮助信息!\n{help_command_text}\npycqbot {__VERSIONS__}"
+        # 帮助信息每页指令数 0 为不分页
+        self.helpPageSize: int = 0
+        # 定时任务线程池大小 所有定时任务共用
+        self.timingPoolSize: int = 4
+        # 定时任务同时执行的群数
+        self.timingConcurrency: int = 4
+        # 定时任务每个群的运行超时 单位秒 0 为不限制
+        self.timingTimeout: float = 0
+        # 定时任务每个群运行完成时是否触发 timing_job_end 事件
+        self.timingGroupEvent: bool = False
+        # 定时任务运行记录文件 为空时不保存
+        self.timingRecordPath: str = ""
+        # 定时任务上次运行的计划时间
+        self.__timing_record: dict[str, float] = {}
+        # 正在保存的运行记录 保存期间更新的记录在保存完成后再保存一次
+        self.__timing_record_save: Optional[asyncio.Future] = None
+        self.__timing_record_dirty: bool = False
+        # 定时任务调度器 添加定时任务时创建
+        self.timing_scheduler: Optional[timingScheduler] = None
+        self._timing_pool: Optional[ThreadPoolExecutor] = None
+        self._timing_pool_size: int = 0
         # 长效消息存储
         self.messageSql: bool = False
         # 长效消息存储 数据库目录
         self.messageSqlPath: str = "./"
         # 长效消息存储 清理间隔
         self.messageSqlClearTime: int = 60
+        # 长效消息存储 重新启动时保留未失效的消息
+        self.messageSqlPersist: bool = False
+        # 最近消息缓存 每个群 / 私聊缓存的消息数 0 为不缓存
+        self.messageCacheCount: int = 100
+        # 最近消息缓存 消息缓存时间 单位秒
+        self.messageCacheTime: float = 600
+        # 最近消息缓存 最多缓存的消息数
+        self.messageCacheMaxSize: int = 10000
         # go_cqhttp 状态 通过心跳更新
         self._go_cqhttp_status: dict = {}
 
@@ -219,11 +371,47 @@ class cqBot(cqEvent.Event):
         self.__host = host
         self._websocket_start_in = True
 
+        # 重新连接等待时间 每次失败后翻倍 单位秒
         self.reconnection_sleep = 10
+        # 重新连接等待时间上限 单位秒
+        self.reconnectionMaxSleep: float = 120
+        # 重新连接次数
         self.reconnection = 3
+        # 连续未收到心跳的次数超过此值时重新连接 0 为不检测
+        self.heartbeatTimeout: int = 3
+        # 心跳间隔 收到心跳后设置 单位秒
+        self._heartbeat_interval: Optional[float] = None
+        # websocket 连接统计
+        self.websocket_stat: dict[str, Any] = {
+            "connect": 0,
+            "reconnect": 0,
+            "heartbeat_timeout": 0,
+            "downtime": 0.0,
+            "down_since": None,
+        }
 
         self._start_in: bool = False
 
+        # 事件处理模式 thread 每个事件创建线程 / async 在 websocket 事件循环中分发事件
+        self.eventRunMode: str = "thread"
+        # 事件处理线程池大小 同时也是事件处理协程数 (async 模式)
+        self.eventPoolSize: int = 8
+        # 事件队列最大长度 (async 模式)
+        self.eventPoolQueueSize: int = 64
+        # 事件队列已满时的处理策略 block / drop_meta / priority (async 模式)
+        self.eventQueueOverflow: str = "block"
+        # 群事件优先级 群号 -> 优先级 默认 0 (priority 策略)
+        self.eventGroupPriority: dict[int, int] = {}
+        # 同一会话 (群 / 私聊) 的事件与指令按顺序处理 (async 模式)
+        self.eventOrdered: bool = True
+        # 事件队列 websocket 连接时创建
+        self.event_queue: Optional[eventQueue] = None
+        self._event_pool: Optional[ThreadPoolExecutor] = None
+        self._event_workers: list[asyncio.Task] = []
+        # 等待加入事件队列的事件 Api 通过 websocket 请求时使用, 事件队列已满时继续读取 Api 响应
+        self._event_pending: Optional[asyncio.Queue] = None
+        self._websocket_loop: Optional[asyncio.AbstractEventLoop] = None
+
         for key in options.keys():
             if type(options[key]) is str:
                 exec("self.%s = '%s'" % (key, options[key]))
@@ -235,13 +423,14 @@ class cqBot(cqEvent.Event):
             显示帮助信息
         """
 
-        def print_help(_, message: Message):
-            message.reply(self.get_command_help_text())
+        def print_help(commandData, message: Message):
+            page = int(commandData[0]) if commandData and commandData[0].isdigit() else 1
+            message.reply(self.get_command_help_text(message.event.message_type, message.user_id in self.admin, page))
 
         self.command(print_help, "help", {
             "type": "all",
             "help": [
-                self.commandSign + "help - 显示本条帮助信息",
+                self._get_command_sign() + "help - 显示本条帮助信息",
             ]
         })
 
@@ -256,7 +445,8 @@ class cqBot(cqEvent.Event):
                 logging.warning("go-cqhttp 心跳未被正常配置")
                 return
 
-            status_msg = "bot (qq=%s) 是否在线：%s\n收到数据包：%s\n发送数据包：%s\n丢失数据包：%s\n接受信息：%s\n发送信息：%s\nTCP 链接断开：%s\n账号掉线次数：%s\n最后消息时间：%s" % (
+            websocket_status = self.get_websocket_status()
+            status_msg = "bot (qq=%s) 是否在线：%s\n收到数据包：%s\n发送数据包：%s\n丢失数据包：%s\n接受信息：%s\n发送信息：%s\nTCP 链接断开：%s\n账号掉线次数：%s\n最后消息时间：%s\nwebsocket 重新连接次数：%s\nwebsocket 断开时间：%.1fs" % (
                 self.__bot_qq,
                 self._go_cqhttp_status["online"],
                 self._go_cqhttp_status["stat"]["packet_received"],
@@ -267,6 +457,8 @@ class cqBot(cqEvent.Event):
                 self._go_cqhttp_status["stat"]["disconnect_times"],
                 self._go_cqhttp_status["stat"]["lost_times"],
                 self._go_cqhttp_status["stat"]["last_message_time"],
+                websocket_status["reconnect"],
+                websocket_status["downtime"],
             )
 
             message.reply(status_msg)
@@ -275,7 +467,7 @@ class cqBot(cqEvent.Event):
             "type": "all",
             "admin": True,
             "help": [
-                self.commandSign + "status - 获取 go-cqhttp 状态",
+                self._get_command_sign() + "status - 获取 go-cqhttp 状态",
             ]
         })
 
@@ -332,7 +524,7 @@ class cqBot(cqEvent.Event):
                 subp = subprocess.Popen("cd %s && ./go-cqhttp -faststart" % go_cqhttp_path, shell=True, stdout=subprocess.PIPE)
             elif plat == 'darwin':
                 subp = subprocess.Popen("cd %s && ./go-cqhttp -faststart" % go_cqhttp_path, shell=True, stdout=subprocess.PIPE)
-            else 
+            else:
                 print("unsupported system: ", plat)
                 sys.exit(1)
             while self._start_in:
@@ -370,41 +562,223 @@ class cqBot(cqEvent.Event):
         """
         连接 websocket 会话
         """
-        old_reconnection = self.reconnection
-        async def main_logic():
-            while self.reconnection != -1:
+        async def websocket_loop():
+            retry = 0
+            while True:
                 try:
                     logging.info("正在连接 go-cqhttp websocket 服务")
-                    # 只接收 event
+                    # 接收 event, cqapi transport 为 websocket 时同时用于发送 Api 请求
                     async with websockets.connect(self.__host) as websocket:
-                        self.reconnection = old_reconnection
-                        while self._start_in:
-                            try:
-                                self._on_message(await websocket.recv())
-                            except ConnectionClosedError as crerr:
-                                logging.warning(crerr)
-                                break
-
-                            except Exception as err:
-                                self.on_error(err)
-
-                except ConnectionRefusedError as crerr:
-                    logging.warning(crerr)
+                        retry = 0
+                        self._set_websocket_stat(True)
+                        self.cqapi._set_websocket(websocket, asyncio.get_running_loop())
+                        try:
+                            await self._websocket_recv(websocket)
+                        finally:
+                            self.cqapi._set_websocket(None, None)
+                            self._set_websocket_stat(False)
+
+                except (OSError, asyncio.TimeoutError, InvalidHandshake) as crerr:
+                    logging.warning("连接 websocket 服务失败 %s" % crerr)
 
                 if not self._start_in:
                     logging.info("关闭 bot")
                     return
-                
-                self.reconnection -= 1
-                logging.warning(f"{self.reconnection_sleep}秒后 重新连接 websocket 服务 ({old_reconnection - self.reconnection}/{old_reconnection})")
-                time.sleep(self.reconnection_sleep)
+
+                retry += 1
+                if retry > self.reconnection:
+                    break
+
+                # 指数退避 随机等待一半到全部时间, 等待期间事件队列中的事件继续处理
+                sleep = min(self.reconnection_sleep * 2 ** (retry - 1), self.reconnectionMaxSleep)
+                sleep = random.uniform(sleep / 2, sleep)
+                logging.warning("%.1f秒后 重新连接 websocket 服务 (%s/%s)" % (sleep, retry, self.reconnection))
+                await asyncio.sleep(sleep)
             
             logging.fatal(f"无法连接 websocket 服务 host: {self.__host}")
+
+        async def main_logic():
+            self._websocket_loop = asyncio.get_running_loop()
+            if self.eventRunMode == "async":
+                self.event_queue = eventQueue(self.eventPoolQueueSize, self.eventQueueOverflow,
+                    self.eventGroupPriority, self.eventQueueDropError, self.eventOrdered)
+                self._event_workers = [asyncio.create_task(self._event_worker()) for _ in range(self.eventPoolSize)]
+                if self.cqapi.transport == "websocket":
+                    self._event_pending = asyncio.Queue(max(self.eventPoolQueueSize, 1))
+                    self._event_workers.append(asyncio.create_task(self._event_feeder()))
+
+            try:
+                await websocket_loop()
+            finally:
+                for worker in self._event_workers:
+                    worker.cancel()
+
+                self._event_workers = []
+                self._event_pending = None
         
+        self._set_event_handlers()
+        self.reload_filter()
+        self._set_message_cache()
+        self._event_pool = ThreadPoolExecutor(max_workers=self.eventPoolSize, thread_name_prefix="run_event")
         try:
             asyncio.run(main_logic())
         except KeyboardInterrupt:
             print("\n")
+        finally:
+            self._event_pool.shutdown(wait=False)
+            self._websocket_loop = None
+            if self.cqapi.message_store is not None and not self.cqapi.message_store.closed:
+                # 提交写入队列中的消息
+                self.cqapi.message_store.flush()
+
+    def _set_message_cache(self) -> None:
+        """
+        创建最近消息缓存 messageCacheCount 为 0 时不缓存
+        """
+        if self.messageCacheCount <= 0:
+            self.cqapi.message_cache = None
+            return
+
+        if self.cqapi.message_cache is None:
+            self.cqapi.message_cache = messageCache(self.messageCacheCount, self.messageCacheTime, self.messageCacheMaxSize)
+
+    async def _websocket_recv(self, websocket: Any) -> None:
+        """
+        接收 websocket 数据 连续 heartbeatTimeout 次未收到心跳时断开连接
+        """
+        while self._start_in:
+            timeout = None
+            if self.heartbeatTimeout > 0 and self._heartbeat_interval is not None:
+                timeout = self._heartbeat_interval * self.heartbeatTimeout
+
+            try:
+                message_data = await asyncio.wait_for(websocket.recv(), timeout)
+            except asyncio.TimeoutError:
+                self.websocket_stat["heartbeat_timeout"] += 1
+                logging.warning("%.1f秒未收到 websocket 心跳 断开连接" % timeout)
+                return
+            except ConnectionClosed as crerr:
+                logging.warning("websocket 连接断开 %s" % crerr)
+                return
+
+            try:
+                await self._websocket_on_message(message_data)
+            except Exception as err:
+                self.on_error(err)
+
+    def _set_websocket_stat(self, connected: bool) -> None:
+        stat = self.websocket_stat
+        if connected:
+            stat["connect"] += 1
+            if stat["connect"] > 1:
+                stat["reconnect"] += 1
+
+            if stat["down_since"] is not None:
+                stat["downtime"] += time.time() - stat["down_since"]
+                stat["down_since"] = None
+            return
+
+        stat["down_since"] = time.time()
+        self._heartbeat_interval = None
+
+    def get_websocket_status(self) -> dict[str, Any]:
+        """
+        获取 websocket 连接状态
+
+        connect 连接次数 reconnect 重新连接次数 heartbeat_timeout 心跳超时次数 downtime 断开连接的总时间
+        """
+        stat = dict(self.websocket_stat)
+        stat["connected"] = self.websocket_stat["connect"] > 0 and stat["down_since"] is None
+        if stat["down_since"] is not None:
+            stat["downtime"] += time.time() - stat["down_since"]
+
+        return stat
+
+    async def _websocket_on_message(self, message_data: str) -> None:
+        """
+        websocket 接收数据处理
+        async 模式下事件加入事件队列, 队列已满时按 eventQueueOverflow 处理
+        """
+        event_name, event = self._on_message(message_data)
+        if event is None:
+            return
+
+        if type(event) is Meta_Event and event.meta_event_type == "heartbeat" and "interval" in event.data:
+            self._heartbeat_interval = event.data["interval"] / 1000
+
+        if self.eventRunMode != "async":
+            return
+
+        if type(event) is Message_Event:
+            # 等待回复不经过事件队列, 避免等待中的会话阻塞自身的回复
+            self._message_reply(event)
+
+        if self._event_pending is not None:
+            # 事件处理函数可能正在等待 Api 响应, 不能暂停读取 websocket
+            # 没有等待中的事件时直接加入事件队列, 需要等待时加入等待队列, 等待队列也已满时丢弃
+            if self._event_pending.empty() and self.event_queue.put_nowait(event_name, event) is not None:
+                return
+
+            if self._event_pending.full():
+                self.event_queue.drop(event_name, event)
+                return
+
+            self._event_pending.put_nowait((event_name, event))
+            return
+
+        await self.event_queue.put(event_name, event)
+
+    async def _event_feeder(self) -> None:
+        """
+        按接收顺序将等待的事件加入事件队列
+        """
+        while True:
+            event_name, event = await self._event_pending.get()
+            await self.event_queue.put(event_name, event)
+
+    def _message_reply(self, event: Message_Event) -> None:
+        """
+        唤醒等待该消息的等待回复
+        """
+        user_id = event.data.get("user_id")
+        if self.cqapi._reply_ck(user_id):
+            self.cqapi._reply_add(user_id, event.get_message(self.cqapi))
+
+    async def _event_worker(self) -> None:
+        """
+        事件处理协程 从事件队列取出事件分发
+        """
+        while True:
+            event_name, event, key = await self.event_queue.get()
+            try:
+                await self._dispatch_event(event_name, event)
+            except Exception as err:
+                self.runEventError(event_name, err)
+            finally:
+                self.event_queue.done(key)
+
+    async def _dispatch_event(self, event_name: str, event: Event) -> None:
+        """
+        在 websocket 事件循环中分发事件
+        协程事件直接运行, 同步事件交由事件处理线程池
+        """
+        handlers = self._get_event_handlers(event_name)
+        if not handlers:
+            return
+
+        args = self._get_event_args((event, ))
+        loop = asyncio.get_running_loop()
+
+        run_list = []
+        for handler in handlers:
+            if asyncio.iscoroutinefunction(handler):
+                run_list.append(handler(*args))
+            else:
+                run_list.append(loop.run_in_executor(self._event_pool, self._call_event_handler, event_name, handler, args))
+
+        for result in await asyncio.gather(*run_list, return_exceptions=True):
+            if isinstance(result, Exception):
+                self.runEventError(event_name, result)
 
     def stop(self) -> None:
         """
@@ -450,30 +824,185 @@ class cqBot(cqEvent.Event):
         except Exception as err:
             self.pluginImportError(plugin, err)
     
-    def _run_event(self, event_name: str, *args) -> None:
+    def _get_event_args(self, args: tuple) -> tuple:
         event = args[0]
         if type(event) is Message_Event:
             event = event.get_message(self.cqapi)
-        args = (event, *args[1:])
+            if self.dropMessageData:
+                event._drop_data()
 
-        def bot_event(self, event_name, *args):
-            exec("self.%s(*args)" % event_name)
+            if self.cqapi.message_cache is not None:
+                self.cqapi.message_cache.add(event)
 
-        def plugin_event(plugin_obj, event_name, *args):
-            exec(f'plugin_obj.{event_name}(*args)')
+        return (event, *args[1:])
 
-        with ThreadPoolExecutor(max_workers=len(self.__plugin_list)+1, thread_name_prefix="run_%s" % event_name) as pool:
-            futures = []
+    @staticmethod
+    def _get_event_handler(obj: cqEvent.Event, event_name: str) -> Optional[Callable]:
+        """
+        获取重写的事件函数 未重写 cqEvent.Event 中的空事件时返回 None
+        """
+        handler = getattr(obj, event_name, None)
+        if handler is None or getattr(handler, "__func__", None) is cqEvent.Event.__dict__[event_name]:
+            return None
 
-            futures.append(pool.submit(bot_event, self, event_name, *args))
-            for plugin_obj in self.__plugin_list:
-                futures.append(pool.submit(plugin_event, plugin_obj, event_name, *args))
+        return handler
 
-            while True:
-                if all(futures):
-                    return
+    def _set_event_handlers(self) -> None:
+        """
+        生成事件分发表 事件名 -> bot 与插件重写的事件函数
+
+        在加载插件与启动 bot 时生成, 之后替换的事件函数不会生效
+        """
+        event_handlers: dict[str, list[Callable]] = {}
+        for event_name in cqEvent.EVENT_HANDLER:
+            handlers = []
+            for obj in (self, *self.__plugin_list):
+                handler = self._get_event_handler(obj, event_name)
+                if handler is not None:
+                    handlers.append(handler)
+
+            event_handlers[event_name] = handlers
+
+        self.__event_handlers = event_handlers
+
+    @property
+    def group_id_list(self) -> list[int]:
+        return self.__group_id_list
 
-                time.sleep(0.1)
+    @group_id_list.setter
+    def group_id_list(self, group_id_list: list[int]) -> None:
+        self.__group_id_list = group_id_list
+        self.__event_filter = None
+
+    @property
+    def user_id_list(self) -> list[int]:
+        return self.__user_id_list
+
+    @user_id_list.setter
+    def user_id_list(self, user_id_list: list[int]) -> None:
+        self.__user_id_list = user_id_list
+        self.__event_filter = None
+
+    @property
+    def groupBanList(self) -> list[int]:
+        return self.__groupBanList
+
+    @groupBanList.setter
+    def groupBanList(self, groupBanList: list[int]) -> None:
+        self.__groupBanList = groupBanList
+        self.__event_filter = None
+
+    @property
+    def userBanList(self) -> list[int]:
+        return self.__userBanList
+
+    @userBanList.setter
+    def userBanList(self, userBanList: list[int]) -> None:
+        self.__userBanList = userBanList
+        self.__event_filter = None
+
+    def reload_filter(self) -> None:
+        """
+        重新生成消息事件过滤集合
+
+        重新设置 group_id_list 等列表时自动生成, 直接修改列表内容 (append / remove 等) 后需调用
+        """
+        self.__event_filter = (
+            set(self.userBanList),
+            set(self.groupBanList),
+            set(self.group_id_list),
+            set(self.user_id_list),
+        )
+
+    def _check_event_filter(self, message_data: dict[str, Any]) -> bool:
+        """
+        在创建事件对象前过滤消息事件 被过滤时返回 False
+        """
+        if self.__event_filter is None:
+            self.reload_filter()
+
+        user_ban, group_ban, group_allow, user_allow = self.__event_filter
+        user_id = message_data.get("user_id")
+        if user_id in user_ban:
+            self.event_filter_drop["userBanList"] += 1
+            return False
+
+        if message_data.get("message_type") == "group":
+            group_id = message_data.get("group_id")
+            if group_id in group_ban:
+                self.event_filter_drop["groupBanList"] += 1
+                return False
+
+            if group_allow and group_id not in group_allow:
+                self.event_filter_drop["group_id_list"] += 1
+                return False
+
+            return True
+
+        if user_allow and user_id not in user_allow:
+            self.event_filter_drop["user_id_list"] += 1
+            return False
+
+        return True
+
+    def _get_event_handlers(self, event_name: str) -> list[Callable]:
+        """
+        获取 bot 与所有插件的事件函数
+        """
+        if self.__event_handlers is None:
+            self._set_event_handlers()
+
+        return self.__event_handlers.get(event_name, [])
+
+    def _call_event_handler(self, event_name: str, handler: Callable, args: tuple) -> None:
+        """
+        在当前线程运行事件函数
+        协程事件交由 websocket 事件循环 (未连接时为 cqapi 事件循环) 运行并等待完成
+        """
+        try:
+            if not asyncio.iscoroutinefunction(handler):
+                handler(*args)
+                return
+
+            loop = self._websocket_loop
+            if loop is None or not loop.is_running():
+                loop = self.cqapi._loop
+
+            try:
+                in_loop = asyncio.get_running_loop() is loop
+            except RuntimeError:
+                in_loop = False
+
+            if in_loop:
+                # 在该事件循环中调用时无法等待
+                loop.create_task(self._run_event_coroutine(event_name, handler(*args)))
+                return
+
+            asyncio.run_coroutine_threadsafe(handler(*args), loop).result()
+        except Exception as err:
+            self.runEventError(event_name, err)
+
+    async def _run_event_coroutine(self, event_name: str, coroutine: Coroutine) -> None:
+        try:
+            await coroutine
+        except Exception as err:
+            self.runEventError(event_name, err)
+
+    def _run_event(self, event_name: str, *args) -> None:
+        handlers = self._get_event_handlers(event_name)
+        if not handlers:
+            return
+
+        args = self._get_event_args(args)
+        if self.eventRunMode == "async":
+            # 已在事件处理线程中 直接依次运行, 避免占用线程池
+            for handler in handlers:
+                self._call_event_handler(event_name, handler, args)
+            return
+
+        with ThreadPoolExecutor(max_workers=len(handlers), thread_name_prefix="run_%s" % event_name) as pool:
+            for handler in handlers:
+                pool.submit(self._call_event_handler, event_name, handler, args)
 
     def plugin_load(self, plugin: Union[str, list[str]]) -> "cqBot":
         """
@@ -487,6 +1016,7 @@ class cqBot(cqEvent.Event):
             for plugin_ in plugin:
                 self._import_plugin(plugin_, plugin_config)
         
+        self._set_event_handlers()
         logging.info("加载插件: %s" % plugin)
         return self
 
@@ -510,15 +1040,32 @@ class cqBot(cqEvent.Event):
         除非已经了解如何工作
         """
         try:
+            message_data = jsonCodec.loads(message_data)
+            if "post_type" not in message_data and "echo" in message_data:
+                # websocket Api 响应
+                self.cqapi._websocket_response(message_data)
+                return "", None
+
+            if message_data.get("post_type") in ("message", "message_sent") and not self._check_event_filter(message_data):
+                return "", None
+
             event = _get_event(message_data)
-        except TypeError as err:
+        except (TypeError, ValueError) as err:
             logging.warning(err)
             return "", None
         
         event_name = event.get_event_name()
         logging.debug("go-cqhttp 上报 %s 事件: %s" % (event_name, event.data))
 
+        if type(event) is Notice_Event and self.cqapi.api_cache is not None and event.notice_type in API_CACHE_NOTICE:
+            # 在分发事件前使群成员等缓存失效
+            self.cqapi.api_cache.invalidate(event.data.get("group_id"), event.data.get("user_id"))
+
         if event_name in cqEvent.EVENT:
+            if self.eventRunMode == "async":
+                # async 模式由 _websocket_on_message 分发
+                return event_name, event
+
             def run_event(self, event):
                 self._run_event(event_name, event)
 
@@ -536,19 +1083,37 @@ class cqBot(cqEvent.Event):
         """
         logging.exception(error)
 
-    def get_command_help_text(self) -> str:
+    def get_command_help_text(self, message_type: Optional[str] = None, admin: bool = True, page: int = 0) -> str:
         """
-        获取所有指令帮助文本
+        获取指令帮助文本
+
+        message_type 只获取该消息类型 (group / private) 可用的指令, admin 为 False 时不包括 admin 指令
+        page 为 0 时获取全部指令, 否则按 helpPageSize 分页获取
         """
-        help_command_text = ""
-        for name, command in self.__commandList.items():
-            if not command["help"]:
-                logging.warning("指令 %s 未添加帮助文本" % name)
-                continue
+        if self.__help_text_format is not self.help_text_format:
+            self.__help_text_format = self.help_text_format
+            self.__help_text_cache.clear()
+
+        page = page if self.helpPageSize > 0 else 0
+        key = (message_type, admin, page, self.helpPageSize, self._get_command_sign())
+        help_text = self.__help_text_cache.get(key)
+        if help_text is not None:
+            return help_text
+
+        help_list = [
+            command["help_text"] for command in self.__command_help.values()
+            if (message_type is None or command["type"] in (message_type, "all")) and (admin or not command["admin"])
+        ]
 
-            help_command_text += "\n".join(command["help"]) + "\n"
+        if page > 0:
+            page_count = max((len(help_list) - 1) // self.helpPageSize + 1, 1)
+            page = min(page, page_count)
+            help_list = help_list[(page - 1) * self.helpPageSize:page * self.helpPageSize]
+            help_list.append("第 %s/%s 页 使用 %shelp 页数 翻页\n" % (page, page_count, self._get_command_sign()))
 
-        return "%s\n" % self.help_text_format.format(help_command_text=help_command_text, __VERSIONS__=pycqBot.__VERSIONS__)
+        help_text = "%s\n" % self.help_text_format.format(help_command_text="".join(help_list), __VERSIONS__=pycqBot.__VERSIONS__)
+        self.__help_text_cache[key] = help_text
+        return help_text
         
     def _check_command_options(self, options: dict[str, Any]) -> dict[str, Any]:
         """
@@ -561,12 +1126,14 @@ class cqBot(cqEvent.Event):
             options["admin"] = False
         
         if "user" not in options:
-            options["user"] = ["all"]
+            options["user"] = {"all"}
         else:
-            options["user"] = options["user"].split(",")
+            options["user"] = set(options["user"].split(",") if type(options["user"]) is str else options["user"])
         
         if "ban" not in options:
-            options["ban"] = []
+            options["ban"] = set()
+        else:
+            options["ban"] = set(options["ban"])
 
         if "help" not in options:
             options["help"] = []
@@ -576,12 +1143,43 @@ class cqBot(cqEvent.Event):
     def _check_timing_options(self, options: dict[str, Any], timing_name: str) -> Optional[dict[str, Any]]:
         options["name"] = timing_name
 
-        if "timeSleep" not in options:
-            logging.warning("定时任务 %s 没有指定 timeSleep 间隔, 中止创建" % timing_name)
+        try:
+            if "cron" in options:
+                options["trigger"] = cronTrigger(options["cron"])
+            elif "at" in options:
+                options["trigger"] = atTrigger(options["at"])
+            elif "timeSleep" in options:
+                options["trigger"] = intervalTrigger(options["timeSleep"])
+            else:
+                logging.warning("定时任务 %s 没有指定 timeSleep 间隔, cron 或 at 时间, 中止创建" % timing_name)
+                return None
+        except ValueError as err:
+            logging.warning("定时任务 %s 运行时间设置错误 %s, 中止创建" % (timing_name, err))
+            return None
+
+        if options["trigger"](time.time()) is None:
+            logging.warning("定时任务 %s 没有下次运行时间, 中止创建" % timing_name)
             return None
 
+        if "misfire" not in options:
+            options["misfire"] = "coalesce"
+
+        if "misfireGrace" not in options:
+            options["misfireGrace"] = 60
+
         if "ban" not in options:
-            options["ban"] = []
+            options["ban"] = set()
+        else:
+            options["ban"] = set(options["ban"])
+
+        if "jitter" not in options:
+            options["jitter"] = 0
+
+        if "concurrency" not in options:
+            options["concurrency"] = 0
+
+        if "timeout" not in options:
+            options["timeout"] = 0
 
         return options
         
@@ -594,31 +1192,183 @@ class cqBot(cqEvent.Event):
         if type(command_name) == str:
             command_name = [command_name]
 
+        options["function"] = function
         for name in command_name:
+            self.remove_command(name)
             self.__commandList[name] = options
-            self.__commandList[name]["function"] = function
+
+        if options["help"]:
+            options["help_text"] = "\n".join(options["help"]) + "\n"
+            self.__command_help[id(options)] = options
+            self.__help_text_cache.clear()
+        else:
+            logging.warning("指令 %s 未添加帮助文本" % ", ".join(command_name))
 
         return self
 
-    def _timing_job(self, job: dict[str, Any]) -> None:
-        run_count = 0
-        while True:
-            self._run_event("timing_jobs_start", job, run_count)
-            for group_id in self.group_id_list:
-                if group_id in job["ban"]:
-                    return
-                
-                run_count += 1
-                try:
-                    job["function"](group_id)
-                    self._run_event("timing_job_end", job, run_count, group_id)
+    def remove_command(self, command_name: Union[str, list[str]]) -> "cqBot":
+        """
+        删除指令
+        """
+        if type(command_name) == str:
+            command_name = [command_name]
+
+        for name in command_name:
+            options = self.__commandList.pop(name, None)
+            if options is None:
+                continue
+
+            if any(value is options for value in self.__commandList.values()):
+                continue
 
-                except Exception as err:
-                    self.runTimingError(job, run_count, err, group_id)
-                    self._run_event("runTimingError", job, run_count, err, group_id)
+            if self.__command_help.pop(id(options), None) is not None:
+                self.__help_text_cache.clear()
+
+        return self
 
-            self._run_event("timing_jobs_end", job, run_count)
-            time.sleep(job["timeSleep"])
+    def _get_timing_scheduler(self) -> timingScheduler:
+        """
+        获取定时任务调度器 定时任务在 cqapi 事件循环中调度
+        """
+        if self.timing_scheduler is None:
+            # 线程池不小于 timingConcurrency 否则排队的群会占用运行超时
+            self._timing_pool_size = max(self.timingPoolSize, self.timingConcurrency)
+            self._timing_pool = ThreadPoolExecutor(max_workers=self._timing_pool_size, thread_name_prefix="timing")
+            self.timing_scheduler = timingScheduler(self.cqapi._loop, self.timingSkipError, self._set_timing_record)
+            self._load_timing_record()
+
+        return self.timing_scheduler
+
+    def _load_timing_record(self) -> None:
+        """
+        读取定时任务上次运行记录
+        """
+        if self.timingRecordPath == "" or not os.path.isfile(self.timingRecordPath):
+            return
+
+        try:
+            with open(self.timingRecordPath, "r", encoding="utf8") as file:
+                self.__timing_record = jsonCodec.loads(file.read())
+        except (OSError, ValueError) as err:
+            logging.warning("读取定时任务运行记录失败 %s" % err)
+
+    def _set_timing_record(self, timing_name: str, run_time: float) -> None:
+        """
+        记录定时任务上次运行的计划时间 在调度器事件循环中调用
+
+        运行记录文件在线程池中写入, 同一时间只有一次写入, 写入期间的更新合并到下一次写入
+        """
+        self.__timing_record[timing_name] = run_time
+        if self.timingRecordPath == "":
+            return
+
+        if self.__timing_record_save is not None:
+            self.__timing_record_dirty = True
+            return
+
+        self._save_timing_record()
+
+    def _save_timing_record(self) -> None:
+        self.__timing_record_dirty = False
+        self.__timing_record_save = self.cqapi._loop.run_in_executor(
+            None, self._write_timing_record, jsonCodec.dumps(self.__timing_record)
+        )
+        self.__timing_record_save.add_done_callback(self._save_timing_record_done)
+
+    def _save_timing_record_done(self, future: asyncio.Future) -> None:
+        self.__timing_record_save = None
+        if self.__timing_record_dirty:
+            self._save_timing_record()
+
+    def _write_timing_record(self, data: str) -> None:
+        """
+        写入定时任务运行记录文件
+        """
+        try:
+            with open("%s.tmp" % self.timingRecordPath, "w", encoding="utf8") as file:
+                file.write(data)
+
+            os.replace("%s.tmp" % self.timingRecordPath, self.timingRecordPath)
+        except OSError as err:
+            logging.warning("保存定时任务运行记录失败 %s" % err)
+
+    def _run_timing(self, function: Callable, *args) -> Any:
+        # 定时任务发送的消息作为广播消息 在发送队列中最后发送
+        with set_send_priority(SEND_PRIORITY_BROADCAST):
+            return function(*args)
+
+    def _run_timing_started(self, loop: asyncio.AbstractEventLoop, started: asyncio.Event, function: Callable, *args) -> Any:
+        # 通知事件循环函数开始运行 超时从这里开始计算
+        loop.call_soon_threadsafe(started.set)
+        return self._run_timing(function, *args)
+
+    async def _run_timing_wait(self, loop: asyncio.AbstractEventLoop, function: Callable, group_id: int, timeout: Optional[float]) -> None:
+        """
+        在线程池中运行定时任务函数 超时从函数开始运行时计算, 不包含在线程池中排队的时间
+
+        超时后线程中的函数不会被中止, 仍会占用线程直到运行完成
+        """
+        started = asyncio.Event()
+        future = loop.run_in_executor(self._timing_pool, self._run_timing_started, loop, started, function, group_id)
+        # 线程池关闭等情况下函数不会运行 结束时同样视为开始
+        future.add_done_callback(lambda _: started.set())
+        await started.wait()
+        await asyncio.wait_for(future, timeout)
+
+    def _run_timing_end(self, job: dict[str, Any], success_list: list[tuple[int, int]], error_list: list[tuple[int, int, Exception]]) -> None:
+        """
+        一轮定时任务运行完成 汇总触发事件
+        """
+        if self.timingGroupEvent:
+            for run_count, group_id in success_list:
+                self._run_event("timing_job_end", job, run_count, group_id)
+
+        for run_count, group_id, err in error_list:
+            self.runTimingError(job, run_count, err, group_id)
+            self._run_event("runTimingError", job, run_count, err, group_id)
+
+        self._run_event("timing_jobs_end", job, job["run_count"])
+
+    async def _timing_job(self, job: dict[str, Any]) -> None:
+        """
+        运行一次定时任务 群之间并发运行
+
+        同时运行的群数为 concurrency (默认 timingConcurrency, 最多为线程池大小), 每个群最多运行 timeout 秒 (默认 timingTimeout)
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(min(job["concurrency"] or self.timingConcurrency, self._timing_pool_size))
+        timeout = job["timeout"] or self.timingTimeout or None
+        group_id_list = [group_id for group_id in self.group_id_list if group_id not in job["ban"]]
+        result = {"group": len(group_id_list), "success": 0, "error": 0, "timeout": 0, "time": 0.0}
+        success_list: list[tuple[int, int]] = []
+        error_list: list[tuple[int, int, Exception]] = []
+
+        async def run_group(group_id: int) -> None:
+            async with semaphore:
+                job["run_count"] += 1
+                run_count = job["run_count"]
+                try:
+                    if asyncio.iscoroutinefunction(job["function"]):
+                        with set_send_priority(SEND_PRIORITY_BROADCAST):
+                            await asyncio.wait_for(job["function"](group_id), timeout)
+                    else:
+                        await self._run_timing_wait(loop, job["function"], group_id, timeout)
+                except asyncio.TimeoutError:
+                    result["timeout"] += 1
+                    error_list.append((run_count, group_id, asyncio.TimeoutError("运行超时 %ss" % timeout)))
+                except Exception as run_err:
+                    result["error"] += 1
+                    error_list.append((run_count, group_id, run_err))
+                else:
+                    result["success"] += 1
+                    success_list.append((run_count, group_id))
+
+        await loop.run_in_executor(self._timing_pool, self._run_timing, self._run_event, "timing_jobs_start", job, job["run_count"])
+        start_time = time.perf_counter()
+        await asyncio.gather(*(run_group(group_id) for group_id in group_id_list))
+        result["time"] = time.perf_counter() - start_time
+        job["result"] = result
+        await loop.run_in_executor(self._timing_pool, self._run_timing, self._run_timing_end, job, success_list, error_list)
     
     def timing(self, function: Callable[[int], None], timing_name: str, options: Optional[dict[str, Any]] = None) -> "cqBot":
         if options is None:
@@ -633,15 +1383,24 @@ class cqBot(cqEvent.Event):
             return self
 
         options["function"] = function
+        options["run_count"] = 0
         self.__timingList[timing_name] = options
 
-        thread = Thread(target=self._timing_job, args=(self.__timingList[timing_name],), name=timing_name)
-        thread.setDaemon(True)
-        thread.start()
+        self._get_timing_scheduler().add(timing_name, options["trigger"], functools.partial(self._timing_job, options),
+            options["jitter"], options["misfire"], options["misfireGrace"], self.__timing_record.get(timing_name))
 
         logging.info("创建定时任务 %s " % timing_name)
 
         return self
+
+    def remove_timing(self, timing_name: str) -> "cqBot":
+        """
+        删除定时任务
+        """
+        if self.__timingList.pop(timing_name, None) is not None:
+            self._get_timing_scheduler().remove(timing_name)
+
+        return self
     
     def set_bot_status(self, event: Meta_Event) -> None:
         self.__bot_qq = event.data["self_id"]
@@ -653,7 +1412,7 @@ class cqBot(cqEvent.Event):
         """
         self.set_bot_status(event)
         if self.messageSql is True:
-            self.cqapi._create_sql_link(self.messageSqlPath, self.messageSqlClearTime)
+            self.cqapi._create_sql_link(self.messageSqlPath, self.messageSqlClearTime, self.messageSqlPersist)
 
         logging.info("成功连接 websocket 服务! bot qq:%s" % self.__bot_qq)
     
@@ -683,9 +1442,17 @@ class cqBot(cqEvent.Event):
         """
         群列表定时任务执行完成
         """
-        logging.debug("定时任务 %s 执行完成! 共执行 %s 次" % (job["name"], run_count))
-        pass
+        result = job["result"]
+        logging.debug("定时任务 %s 执行完成! 共执行 %s 次 本轮 %s 个群 成功 %s 错误 %s 超时 %s 耗时 %.3fs" % (
+            job["name"], run_count, result["group"], result["success"], result["error"], result["timeout"], result["time"]
+        ))
     
+    def timingSkipError(self, timing_name: str):
+        """
+        定时任务上次运行未结束 跳过本次运行
+        """
+        logging.warning("定时任务 %s 上次运行未结束 跳过本次运行" % timing_name)
+
     def runTimingError(self, job, run_count, err, group_id):
         """
         定时任务执行错误
@@ -713,59 +1480,83 @@ class cqBot(cqEvent.Event):
 
         return "%s (qq=%s)" % (user_name, user_id)
 
-    def _set_command_key(self, message: str):
+    def _get_command_sign(self) -> str:
         """
-        指令解析
+        获取指令标志符 多个标志符时为第一个
         """
+        return self.commandSign if type(self.commandSign) is str else self.commandSign[0]
 
-        if self.commandSign != "" and list(message):
-            commandSign = list(message)[0]
-        else:
-            commandSign = ""
+    def _get_command_signs(self) -> tuple[str, ...]:
+        """
+        获取所有指令标志符 按长度从长到短排列, commandSign 被重新设置或修改内容时重新生成
 
-        command_str_list = message.split(" ")
-        command = command_str_list[0].lstrip(commandSign)
-        commandData = command_str_list[1:]
+        与生成时保存的 commandSign 副本比较, 没有变化时不创建新对象
+        """
+        commandSign = self.commandSign
+        if commandSign != self.__command_sign[0]:
+            if type(commandSign) is str:
+                self.__command_sign = (commandSign, (commandSign, ))
+            else:
+                self.__command_sign = (commandSign[:], tuple(sorted(commandSign, key=len, reverse=True)))
 
-        return commandSign, command, commandData
+        return self.__command_sign[1]
+
+    def _set_command_key(self, message: str) -> Optional[tuple[str, str, list[str]]]:
+        """
+        指令解析 不是指令时返回 None
+        """
+        signs = self._get_command_signs()
+        if not message.startswith(signs):
+            return None
+
+        commandSign = signs[0]
+        if len(signs) != 1:
+            for commandSign in signs:
+                if message.startswith(commandSign):
+                    break
+
+        command, sep, commandData = message[len(commandSign):].partition(" ")
+        return commandSign, command, commandData.split(" ") if sep else []
     
-    def _check_command(self, message: Union[Private_Message, Group_Message]):
+    def _check_command(self, message: Union[Private_Message, Group_Message], commandIn: Optional[tuple[str, str, list[str]]] = None):
         """
         指令检查
         """
+        if commandIn is None:
+            commandIn = self._set_command_key(message.message)
+            if commandIn is None:
+                return False
 
-        commandSign, command, commandData = self._set_command_key(message.message)
-
-        if commandSign != self.commandSign:
-            return False
-        
-        if command not in self.__commandList:
+        commandSign, command, commandData = commandIn
+        options = self.__commandList.get(command)
+        if options is None:
             self.notCommandError(message)
             return False
 
-        if self.__commandList[command]["type"] != message.event.message_type and self.__commandList[command]["type"] != "all":
+        if options["type"] != message.event.message_type and options["type"] != "all":
             return False
         
         self.check_command(message)
         
         if type(message) is Group_Message:
 
-            if message.group_id in self.__commandList[command]["ban"]:
+            if message.group_id in options["ban"]:
                 self.banCommandError(message)
                 return False
             
-            user_list = self.__commandList[command]["user"]
-            if user_list[0] != "all":
+            user_list = options["user"]
+            if "all" not in user_list:
 
                 if message.anonymous is not None and "anonymous" not in user_list:
                     self.userPurviewError(message)
                     return False
                 
-                if message.sender.role not in user_list or user_list[0] != "nall":
+                # nall 除了匿名组全部可以使用
+                if message.anonymous is None and "nall" not in user_list and message.sender.role not in user_list:
                     self.userPurviewError(message)
                     return False
 
-        if self.__commandList[command]["admin"] and message.sender.id not in self.admin:
+        if options["admin"] and message.user_id not in self.admin:
             self.purviewError(message)
             return False
 
@@ -775,10 +1566,13 @@ class cqBot(cqEvent.Event):
         """
         指令运行
         """
+        commandIn = self._set_command_key(message.message)
+        if commandIn is None:
+            return
+
         def run_command(message):
             try:
-                commandIn = self._check_command(message)
-                if not commandIn:
+                if not self._check_command(message, commandIn):
                     return
 
                 commandSign, command, commandData = commandIn
@@ -786,6 +1580,11 @@ class cqBot(cqEvent.Event):
 
             except Exception as err:
                 self.runCommandError(message, err)
+
+        if self.eventRunMode == "async" and self.eventOrdered:
+            # 已在会话的事件处理中 按顺序运行
+            run_command(message)
+            return
         
         thread = Thread(target=run_command, args=(message, ), name="command")
         thread.setDaemon(True)
@@ -802,8 +1601,8 @@ class cqBot(cqEvent.Event):
         通用消息处理
         """
         # 检查等待回复
-        if self.cqapi._reply_ck(message.sender.id):
-            self.cqapi._reply_add(message.sender.id, message)
+        if self.cqapi._reply_ck(message.user_id):
+            self.cqapi._reply_add(message.user_id, message)
         
         return message
     
@@ -815,24 +1614,21 @@ class cqBot(cqEvent.Event):
         return message
 
 
-    def _message_private(self, message: Private_Message) -> Optional[Private_Message]:
+    def _message_private(self, message: Private_Message) -> Private_Message:
         """
         通用私聊消息处理
         """
-        if (message.sender.id not in self.user_id_list) and self.user_id_list != []:
-            return None
-        
         return self._message_run(message)
     
-    def _message_group(self, message: Group_Message) -> Optional[Group_Message]:
+    def _message_group(self, message: Group_Message) -> Group_Message:
         """
         通用群消息处理
         """
-        if message.group_id not in self.group_id_list and self.group_id_list != []:
-            return None
-
         message = self._message_run(message)
 
+        if "[CQ:at," not in message.message:
+            return message
+
         for cqCode in message.code:
             if cqCode["type"] != "at":
                 continue
@@ -934,6 +1730,19 @@ class cqBot(cqEvent.Event):
         """
         self._bot_message_log("指令 %s 运行时错误... Error: %s" % (message.message, err), message)
         logging.exception(err)
+
+    def eventQueueDropError(self, event_name: str, event: Event):
+        """
+        事件队列已满 事件被丢弃
+        """
+        logging.warning("事件队列已满 丢弃事件 %s" % event_name)
+
+    def runEventError(self, event_name: str, err: Exception):
+        """
+        事件运行时错误
+        """
+        logging.error("事件 %s 运行时错误 Error: %s" % (event_name, err))
+        logging.exception(err)
     
     def notice_group_decrease_kick_me(self, event: Notice_Event):
         """
@@ -941,6 +1750,7 @@ class cqBot(cqEvent.Event):
         """
         if event.data["group_id"] in self.group_id_list:
             self.group_id_list.remove(event.data["group_id"])
+            self.reload_filter()
 
         async def _notice_group_decrease_kick_me(message):
             user_data = await self.cqapi._asynclink("/get_stranger_info", {
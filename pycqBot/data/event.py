@@ -2,8 +2,8 @@ from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
 from typing import Any, Union, TYPE_CHECKING
-import json
 
+from pycqBot import jsonCodec
 from pycqBot.data.message import Group_Message, Private_Message
 
 if TYPE_CHECKING:
@@ -42,6 +42,8 @@ class Meta:
 
 class Event(metaclass=ABCMeta):
 
+    __slots__ = ("data", "post_type", "sub_type")
+
     def __init__(self, event_data: dict[str, Any]) -> None:
         self.data = event_data
         """事件数据"""
@@ -73,6 +75,8 @@ class Event(metaclass=ABCMeta):
 class Message_Event(Event):
     """消息事件"""
 
+    __slots__ = ("message_type", )
+
     def __init__(self, event_data: dict[str, Any]) -> None:
         super().__init__(event_data)
 
@@ -97,6 +101,8 @@ class Message_Event(Event):
 class Notice_Event(Event):
     """通知事件"""
 
+    __slots__ = ("notice_type", )
+
     def __init__(self, event_data: dict[str, Any]) -> None:
         super().__init__(event_data)
 
@@ -110,6 +116,8 @@ class Notice_Event(Event):
 class Request_Event(Event):
     """请求事件"""
 
+    __slots__ = ("request_type", )
+
     def __init__(self, event_data: dict[str, Any]) -> None:
         super().__init__(event_data)
 
@@ -123,6 +131,8 @@ class Request_Event(Event):
 class Meta_Event(Event):
     """元事件"""
 
+    __slots__ = ("meta_event_type", )
+
     def __init__(self, event_data: dict[str, Any]) -> None:
         super().__init__(event_data)
 
@@ -133,8 +143,8 @@ class Meta_Event(Event):
         return self.meta_event_type
     
 
-def _get_event(message: str) -> Event:
-    message_data = json.loads(message)
+def _get_event(message: Union[str, dict[str, Any]]) -> Event:
+    message_data = jsonCodec.loads(message) if type(message) is str else message
     if message_data["post_type"] == Message.MESSAGE_POST_TYPE:
         return Message_Event(message_data)
     
@@ -3,6 +3,7 @@ from __future__ import annotations
 from abc import ABCMeta, abstractmethod
 from typing import Any, Union, TYPE_CHECKING, Optional
 from pycqBot.cqCode import reply, strToCqCode, get_cq_code
+from pycqBot.sendQueue import SEND_PRIORITY_REPLY, set_send_priority
 from pycqBot.data.user import Private_User, Group_User, User
 
 
@@ -13,9 +14,15 @@ if TYPE_CHECKING:
 
 class Message(metaclass=ABCMeta):
 
+    __slots__ = (
+        "_cqapi", "_message_data", "_sender_data", "_sender", "_code_str", "_code",
+        "event", "id", "real_id", "time", "sub_type", "raw_message", "font", "user_id", "message"
+    )
+
     def __init__(self, cqapi: cqHttpApi, event: Message_Event, message_data: dict[str, Any]) -> None:
         self._cqapi = cqapi
-        self._message_data: dict[str, Any] = message_data
+        self._message_data: Optional[dict[str, Any]] = message_data
+        self._sender_data: dict[str, Any] = message_data["sender"]
 
         self.event = event
         """消息事件"""
@@ -23,6 +30,12 @@ class Message(metaclass=ABCMeta):
         self.id: int = message_data["message_id"]
         """消息 id"""
 
+        self.real_id: Optional[int] = message_data.get("real_id")
+        """消息真实 id 消息事件中没有时为 None"""
+
+        self.time: Optional[int] = message_data.get("time")
+        """消息发送时间"""
+
         self.sub_type: str = message_data["sub_type"]
         """
         消息子类型\n
@@ -40,17 +53,101 @@ class Message(metaclass=ABCMeta):
         self.font: int = message_data["font"]
         """字体"""
 
-        self.sender: Optional[Union[Private_User, Group_User]] = None
-        """发送人"""
+        self.user_id: int = message_data["user_id"]
+        """发送人 QQ 号"""
 
         self.message: str = message_data["message"]
         """消息"""
 
-        self.code_str: list[str] = strToCqCode(self.message)
-        """消息 cqCode 字符串"""
+        if self.raw_message == self.message:
+            # 共用同一个字符串
+            self.raw_message = self.message
+
+        # cqCode 与发送人在第一次访问时才生成
+        self._sender: Optional[Union[Private_User, Group_User]] = None
+        self._code_str: Optional[list[str]] = None
+        self._code: Optional[list[dict[str, Any]]] = None
+
+    @property
+    def sender(self) -> Union[Private_User, Group_User]:
+        """
+        发送人
+        """
+        if self._sender is None:
+            self._sender = self._get_sender()
+
+        return self._sender
+
+    @sender.setter
+    def sender(self, sender: Union[Private_User, Group_User]) -> None:
+        self._sender = sender
+
+    @property
+    def code_str(self) -> list[str]:
+        """
+        消息 cqCode 字符串
+        """
+        if self._code_str is None:
+            self._code_str = strToCqCode(self.message)
+
+        return self._code_str
+
+    @code_str.setter
+    def code_str(self, code_str: list[str]) -> None:
+        self._code_str = code_str
+
+    @property
+    def code(self) -> list[dict[str, Any]]:
+        """
+        消息 cqCode 字典
+        """
+        if self._code is None:
+            self._code = [get_cq_code(code_str) for code_str in self.code_str]
+
+        return self._code
 
-        self.code: list[dict[str, Any]] = [get_cq_code(code_str) for code_str in self.code_str]
-        """消息 cqCode 字典"""
+    @code.setter
+    def code(self, code: list[dict[str, Any]]) -> None:
+        self._code = code
+
+    @abstractmethod
+    def _get_sender(self) -> Union[Private_User, Group_User]:
+        """
+        生成发送人
+        """
+
+    def _drop_data(self) -> None:
+        """
+        丢弃原始消息数据 只保留解析出的属性
+        """
+        self._message_data = None
+        self.event.data = None
+
+    def _get_message_data(self) -> dict[str, Any]:
+        """
+        获取原始消息数据 已丢弃时通过属性重新生成
+        """
+        if self._message_data is not None:
+            return self._message_data
+
+        message_data = {
+            "post_type": self.event.post_type,
+            "message_type": self.event.message_type,
+            "sub_type": self.sub_type,
+            "message_id": self.id,
+            "user_id": self.user_id,
+            "message": self.message,
+            "raw_message": self.raw_message,
+            "font": self.font,
+            "sender": self._sender_data,
+        }
+        if self.real_id is not None:
+            message_data["real_id"] = self.real_id
+
+        if self.time is not None:
+            message_data["time"] = self.time
+
+        return message_data
 
     @abstractmethod
     def reply(self, message: str, auto_escape: bool=False) -> None:
@@ -80,36 +177,50 @@ class Message(metaclass=ABCMeta):
 class Private_Message(Message):
     """私聊消息"""
 
+    __slots__ = ("target_id", "temp_source")
+
     def __init__(self, cqapi: cqHttpApi, event: Message_Event, message_data: dict[str, Any]) -> None:
         super().__init__(cqapi, event, message_data)
 
-        self.sender: Private_User = Private_User(self._cqapi, message_data["sender"])
-        """发送人"""
-
         self.target_id: int = message_data["target_id"]
         """接收者 QQ 号"""
 
         self.temp_source: Optional[int] = message_data["temp_source"] if "temp_source" in message_data else None
         """临时会话来源"""
 
+    def _get_sender(self) -> Private_User:
+        return Private_User(self._cqapi, self._sender_data)
+
+    def _get_message_data(self) -> dict[str, Any]:
+        if self._message_data is not None:
+            return self._message_data
+
+        message_data = super()._get_message_data()
+        message_data["target_id"] = self.target_id
+        if self.temp_source is not None:
+            message_data["temp_source"] = self.temp_source
+
+        return message_data
+
     def reply(self, message: str, auto_escape: bool = False) -> None:
-        self._cqapi.send_private_msg(self.sender.id, "%s%s" % (reply(msg_id=self.id), message), self.temp_source, auto_escape)
+        with set_send_priority(SEND_PRIORITY_REPLY):
+            self._cqapi.send_private_msg(self.user_id, "%s%s" % (reply(msg_id=self.id), message), self.temp_source, auto_escape)
 
     def reply_not_code(self, message: str, auto_escape: bool=False) -> None:
-        self._cqapi.send_private_msg(self.sender.id, message, self.temp_source, auto_escape)
+        with set_send_priority(SEND_PRIORITY_REPLY):
+            self._cqapi.send_private_msg(self.user_id, message, self.temp_source, auto_escape)
 
 class Group_Message(Message):
     """群消息"""
 
+    __slots__ = ("group_id", "anonymous")
+
     def __init__(self, cqapi: cqHttpApi, event: Message_Event, message_data: dict[str, Any]) -> None:
         super().__init__(cqapi, event, message_data)
 
         self.group_id: int = message_data["group_id"]
         """群号"""
 
-        self.sender: Group_User = Group_User(self._cqapi, self.group_id, message_data["sender"])
-        """发送人"""
-
         self.anonymous: dict[str, Any] = message_data["anonymous"]
         """
         匿名信息\n
@@ -117,11 +228,25 @@ class Group_Message(Message):
             如果不是匿名消息则为 null
         """
 
+    def _get_sender(self) -> Group_User:
+        return Group_User(self._cqapi, self.group_id, self._sender_data)
+
+    def _get_message_data(self) -> dict[str, Any]:
+        if self._message_data is not None:
+            return self._message_data
+
+        message_data = super()._get_message_data()
+        message_data["group_id"] = self.group_id
+        message_data["anonymous"] = self.anonymous
+        return message_data
+
     def reply(self, message: str, auto_escape: bool = False) -> None:
-        self._cqapi.send_group_msg(self.group_id, "%s%s" % (reply(self.id), message), auto_escape)
+        with set_send_priority(SEND_PRIORITY_REPLY):
+            self._cqapi.send_group_msg(self.group_id, "%s%s" % (reply(self.id), message), auto_escape)
 
     def reply_not_code(self, message: str, auto_escape: bool=False) -> None:
-        self._cqapi.send_group_msg(self.group_id, message, auto_escape)
+        with set_send_priority(SEND_PRIORITY_REPLY):
+            self._cqapi.send_group_msg(self.group_id, message, auto_escape)
 
     def set_essence(self):
         """
@@ -12,6 +12,8 @@ if TYPE_CHECKING:
 
 class User(metaclass=ABCMeta):
 
+    __slots__ = ("_cqapi", "id", "nickname", "sex", "age")
+
     def __init__(self, cqapi: cqHttpApi, user_data:  dict[str, Any]) -> None:
         self._cqapi = cqapi
 
@@ -55,6 +57,12 @@ class User(metaclass=ABCMeta):
         """
         return self._cqapi.reply(self.id, sleep)
 
+    async def async_waiting_reply(self, sleep: int):
+        """
+        等待回复 (异步) 等待超时返回 None 用于进行判断
+        """
+        return await self._cqapi.async_reply(self.id, sleep)
+
     @abstractmethod
     def send_message(self, message: str, auto_escape: bool = False):
         """
@@ -70,7 +78,9 @@ class User(metaclass=ABCMeta):
 
 class Private_User(User):
     """私聊用户"""
-    
+
+    __slots__ = ("group_id", )
+
     def __init__(self, cqapi: cqHttpApi, user_data: dict[str, Any]) -> None:
         super().__init__(cqapi, user_data)
 
@@ -101,7 +111,9 @@ class Private_User(User):
 
 class Group_User(User):
     """群聊用户"""
-    
+
+    __slots__ = ("group_id", "card", "area", "level", "role", "title")
+
     def __init__(self, cqapi: cqHttpApi, group_id: int, user_data: dict[str, Any]) -> None:
         super().__init__(cqapi, user_data)
 
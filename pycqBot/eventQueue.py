@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Callable, Optional, TYPE_CHECKING
+import asyncio
+import itertools
+
+if TYPE_CHECKING:
+    from pycqBot.data.event import Event
+
+
+EVENT_OVERFLOW = ("block", "drop_meta", "priority")
+"""
+事件队列已满时的处理策略
+
+    block 等待直到队列有空位\n
+    drop_meta 丢弃最早的元事件 (心跳等), 没有元事件时等待\n
+    priority 丢弃优先级最低的最早事件, 新事件优先级更低时丢弃新事件
+"""
+
+EVENT_PRIORITY_META = float("-inf")
+"""元事件优先级 最先被丢弃"""
+
+
+class eventQueue:
+    """
+    事件队列
+
+    websocket 读取的事件在此排队, 由固定数量的事件处理协程取出
+    ordered 为 True 时同一会话 (群 / 私聊) 的事件按顺序逐个取出, 不同会话并行处理
+    所有操作需要在 websocket 事件循环中进行
+    """
+
+    def __init__(self,
+            max_size: int = 64,
+            overflow: str = "block",
+            group_priority: Optional[dict[int, int]] = None,
+            drop_callback: Optional[Callable[[str, Event], None]] = None,
+            ordered: bool = True
+        ) -> None:
+
+        if overflow not in EVENT_OVERFLOW:
+            raise ValueError("未知事件队列溢出策略: %s" % overflow)
+
+        # 优先级 -> (序号, 事件名, 事件, 会话)
+        self._lanes: dict[float, deque[tuple[int, str, Event, Optional[tuple[str, int]]]]] = {}
+        # 正在处理事件的会话
+        self._busy: set[tuple[str, int]] = set()
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._drop_callback = drop_callback
+        self.ordered = ordered
+        """同一会话的事件是否按顺序处理"""
+
+        self.max_size = max(max_size, 1)
+        """队列最大长度"""
+
+        self.overflow = overflow
+        """队列已满时的处理策略"""
+
+        self.group_priority: dict[int, int] = {} if group_priority is None else group_priority
+        """群事件优先级 群号 -> 优先级 默认 0 (priority 策略)"""
+
+        self.depth = 0
+        """当前排队数"""
+
+        self.max_depth = 0
+        """排队数最高值"""
+
+        self.drop_count = 0
+        """丢弃数"""
+
+        self.drop_meta_count = 0
+        """丢弃的元事件数"""
+
+    def get_status(self) -> dict[str, Any]:
+        """
+        获取事件队列状态
+        """
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "busy": len(self._busy),
+            "dropped": self.drop_count,
+            "dropped_meta": self.drop_meta_count,
+        }
+
+    def _get_priority(self, event: Event) -> float:
+        if event.post_type == "meta_event":
+            return EVENT_PRIORITY_META
+
+        group_id = event.data.get("group_id")
+        if group_id is None:
+            return 0
+
+        return self.group_priority.get(group_id, 0)
+
+    def _get_key(self, event: Event) -> Optional[tuple[str, int]]:
+        """
+        获取事件所属会话 不需要按顺序处理时返回 None
+        """
+        if not self.ordered or event.post_type == "meta_event":
+            return None
+
+        group_id = event.data.get("group_id")
+        if group_id is not None:
+            return ("group", group_id)
+
+        user_id = event.data.get("user_id")
+        if user_id is not None:
+            return ("private", user_id)
+
+        return None
+
+    def drop(self, event_name: str, event: Event) -> None:
+        """
+        丢弃事件 计入丢弃数并调用丢弃回调
+        """
+        self.drop_count += 1
+        if event.post_type == "meta_event":
+            self.drop_meta_count += 1
+
+        if self._drop_callback is not None:
+            self._drop_callback(event_name, event)
+
+    def _drop_oldest(self, priority: float) -> None:
+        _, event_name, event, _ = self._lanes[priority].popleft()
+        self.depth -= 1
+        self.drop(event_name, event)
+
+    def _shed(self, priority: float) -> Optional[bool]:
+        """
+        队列已满时按策略丢弃事件
+
+        腾出空位返回 True, 需要丢弃新事件返回 False, 需要等待返回 None
+        """
+        if self.overflow == "drop_meta":
+            if self._lanes.get(EVENT_PRIORITY_META):
+                self._drop_oldest(EVENT_PRIORITY_META)
+                return True
+
+            return False if priority == EVENT_PRIORITY_META else None
+
+        if self.overflow == "priority":
+            lowest = min(key for key, lane in self._lanes.items() if lane)
+            if lowest > priority:
+                return False
+
+            self._drop_oldest(lowest)
+            return True
+
+        return None
+
+    async def put(self, event_name: str, event: Event) -> bool:
+        """
+        添加事件 队列已满时按策略等待或丢弃, 事件被丢弃时返回 False
+        """
+        priority = self._get_priority(event)
+        while self.depth >= self.max_size:
+            shed = self._shed(priority)
+            if shed is None:
+                self._not_full.clear()
+                await self._not_full.wait()
+                continue
+
+            if not shed:
+                self.drop(event_name, event)
+                return False
+
+        self._append(priority, event_name, event)
+        return True
+
+    def put_nowait(self, event_name: str, event: Event) -> Optional[bool]:
+        """
+        不等待添加事件 队列已满时按策略丢弃, 事件被丢弃时返回 False, 需要等待时不添加并返回 None
+        """
+        priority = self._get_priority(event)
+        while self.depth >= self.max_size:
+            shed = self._shed(priority)
+            if shed is None:
+                return None
+
+            if not shed:
+                self.drop(event_name, event)
+                return False
+
+        self._append(priority, event_name, event)
+        return True
+
+    def _append(self, priority: float, event_name: str, event: Event) -> None:
+        lane = self._lanes.get(priority)
+        if lane is None:
+            lane = self._lanes[priority] = deque()
+
+        lane.append((next(self._seq), event_name, event, self._get_key(event)))
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        self._wakeup.set()
+
+    def _next_item(self) -> Optional[tuple[int, str, Event, Optional[tuple[str, int]]]]:
+        """
+        取出最早接收且所属会话没有在处理的事件
+        """
+        next_lane, next_index, next_item = None, 0, None
+        for lane in self._lanes.values():
+            for index, item in enumerate(lane):
+                if item[3] is not None and item[3] in self._busy:
+                    continue
+
+                if next_item is None or item[0] < next_item[0]:
+                    next_lane, next_index, next_item = lane, index, item
+
+                break
+
+        if next_item is not None:
+            del next_lane[next_index]
+
+        return next_item
+
+    async def get(self) -> tuple[str, Event, Optional[tuple[str, int]]]:
+        """
+        按接收顺序取出事件 没有可以处理的事件时等待
+
+        返回的会话在调用 done 前不会再取出该会话的事件
+        """
+        while True:
+            item = self._next_item() if self.depth else None
+            if item is not None:
+                break
+
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+        _, event_name, event, key = item
+        if key is not None:
+            self._busy.add(key)
+
+        self.depth -= 1
+        self._not_full.set()
+        return event_name, event, key
+
+    def done(self, key: Optional[tuple[str, int]]) -> None:
+        """
+        会话的事件处理完成
+        """
+        if key is None:
+            return
+
+        self._busy.discard(key)
+        self._wakeup.set()
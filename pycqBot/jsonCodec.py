@@ -0,0 +1,87 @@
+"""
+json 编解码
+
+安装 orjson / ujson 时优先使用, 否则使用标准库 json
+dumps 统一输出紧凑且不转义非 ASCII 字符的 str
+"""
+from typing import Any, Callable, Optional, Union
+import json
+import logging
+
+
+def _stdlib_backend() -> tuple[Callable[[Union[str, bytes]], Any], Callable[[Any], str]]:
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+    return json.loads, dumps
+
+
+def _orjson_backend() -> tuple[Callable[[Union[str, bytes]], Any], Callable[[Any], str]]:
+    import orjson
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+    return orjson.loads, dumps
+
+
+def _ujson_backend() -> tuple[Callable[[Union[str, bytes]], Any], Callable[[Any], str]]:
+    import ujson
+
+    def dumps(obj: Any) -> str:
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+
+    return ujson.loads, dumps
+
+
+_BACKEND = {
+    "orjson": _orjson_backend,
+    "ujson": _ujson_backend,
+    "json": _stdlib_backend,
+}
+
+backend: str = "json"
+"""当前使用的 json 库"""
+
+loads: Callable[[Union[str, bytes]], Any] = json.loads
+"""json 解码"""
+
+dumps: Callable[[Any], str] = _stdlib_backend()[1]
+"""json 编码"""
+
+
+def set_json_backend(name: Optional[str] = None, json_loads: Optional[Callable[[Union[str, bytes]], Any]] = None, json_dumps: Optional[Callable[[Any], str]] = None) -> str:
+    """
+    设置 json 库 name 为 None 时按 orjson, ujson, json 顺序自动选择
+
+    也可以直接提供 json_loads / json_dumps 使用自定义实现, 返回当前使用的 json 库
+    """
+    global backend, loads, dumps
+
+    if json_loads is not None or json_dumps is not None:
+        std_loads, std_dumps = _stdlib_backend()
+        backend = name or "custom"
+        loads = json_loads or std_loads
+        dumps = json_dumps or std_dumps
+        return backend
+
+    for backend_name in ((name,) if name is not None else tuple(_BACKEND)):
+        if backend_name not in _BACKEND:
+            raise ValueError("未知 json 库: %s" % backend_name)
+
+        try:
+            loads, dumps = _BACKEND[backend_name]()
+        except ImportError:
+            if name is not None:
+                raise
+
+            continue
+
+        backend = backend_name
+        logging.debug("json 库: %s" % backend)
+        return backend
+
+    return backend
+
+
+set_json_backend()
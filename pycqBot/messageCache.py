@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from typing import Any, Optional, TYPE_CHECKING
+from threading import Lock
+import time
+
+if TYPE_CHECKING:
+    from pycqBot.data.message import Message
+
+
+class messageCache:
+    """
+    最近消息缓存
+
+    每个会话 (群 / 私聊) 保留最近 max_count 条且不超过 max_age 秒的消息, 按消息 id 索引
+    所有会话合计最多 max_size 条, 超出时丢弃最早的消息, 可以在任意线程调用
+    """
+
+    def __init__(self, max_count: int = 100, max_age: float = 600, max_size: int = 10000) -> None:
+        self.max_count = max(max_count, 1)
+        """每个会话最多缓存的消息数"""
+
+        self.max_age = max_age
+        """消息最长缓存时间 单位秒"""
+
+        self.max_size = max(max_size, 1)
+        """最多缓存的消息数"""
+
+        # 消息 id -> (缓存时间, 会话, 消息) 按缓存顺序排列
+        self._index: OrderedDict[int, tuple[float, tuple[str, int], Message]] = OrderedDict()
+        # 会话 -> 消息 id
+        self._lanes: dict[tuple[str, int], deque[int]] = {}
+        self._lock = Lock()
+
+        self.hit_count = 0
+        """命中数"""
+
+        self.miss_count = 0
+        """未命中数"""
+
+    def get_status(self) -> dict[str, Any]:
+        """
+        获取缓存状态
+        """
+        return {
+            "size": len(self._index),
+            "conversation": len(self._lanes),
+            "hit": self.hit_count,
+            "miss": self.miss_count,
+        }
+
+    @staticmethod
+    def _get_key(message: Message) -> tuple[str, int]:
+        group_id = getattr(message, "group_id", None)
+        if group_id is not None:
+            return ("group", group_id)
+
+        return ("private", message.user_id)
+
+    def _pop_oldest(self) -> None:
+        _, (_, key, _) = self._index.popitem(last=False)
+        lane = self._lanes[key]
+        lane.popleft()
+        if not lane:
+            del self._lanes[key]
+
+    def add(self, message: Message) -> None:
+        """
+        缓存消息
+        """
+        now = time.time()
+        key = self._get_key(message)
+        with self._lock:
+            if message.id in self._index:
+                return
+
+            lane = self._lanes.get(key)
+            if lane is None:
+                lane = self._lanes[key] = deque()
+
+            lane.append(message.id)
+            self._index[message.id] = (now, key, message)
+            if len(lane) > self.max_count:
+                del self._index[lane.popleft()]
+
+            while self._index and (len(self._index) > self.max_size or next(iter(self._index.values()))[0] < now - self.max_age):
+                self._pop_oldest()
+
+    def get(self, message_id: int) -> Optional[Message]:
+        """
+        获取缓存的消息 没有缓存或已超过缓存时间时返回 None
+        """
+        with self._lock:
+            item = self._index.get(message_id)
+            if item is None or item[0] < time.time() - self.max_age:
+                self.miss_count += 1
+                return None
+
+            self.hit_count += 1
+            return item[2]
+
+    def clear(self) -> None:
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._index.clear()
+            self._lanes.clear()
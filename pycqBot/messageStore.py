@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Optional, Union
+from threading import Condition, Lock, Thread
+import logging
+import sqlite3
+import time
+
+
+# sqlite 3.35 起支持 DELETE ... RETURNING
+_SQLITE_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# 数据库结构迁移 第 n 项将 user_version 从 n 升级到 n + 1
+_MIGRATIONS: list[tuple[str, ...]] = [
+    (
+        """CREATE TABLE IF NOT EXISTS `Message` (
+            ID               INTEGER PRIMARY KEY AUTOINCREMENT,
+            userId   INTEGER NOT NULL,
+            stime    INTEGER NOT NULL,
+            etime    INTEGER NOT NULL,
+            messageData TEXT NOT NULL
+        )""",
+        # 旧版本以字符串存储 qq 与时间
+        """UPDATE `Message` SET
+            userId = CAST(userId AS INTEGER), stime = CAST(stime AS INTEGER), etime = CAST(etime AS INTEGER)
+        WHERE typeof(userId) != 'integer' OR typeof(stime) != 'integer' OR typeof(etime) != 'integer'""",
+        "CREATE INDEX IF NOT EXISTS `Message_userId` ON `Message` (userId)",
+        "CREATE INDEX IF NOT EXISTS `Message_etime` ON `Message` (etime)",
+    ),
+]
+
+SCHEMA_VERSION = len(_MIGRATIONS)
+"""当前数据库结构版本"""
+
+
+class messageStore:
+    """
+    长效消息存储
+
+    所有读写共用一个 WAL 模式的 sqlite 连接, 写入先进入队列, 由写入线程按批次提交
+    读取前会先提交队列中的写入, 可以在任意线程调用
+    """
+
+    def __init__(self,
+            db_path: str,
+            batch_size: int = 256,
+            flush_interval: float = 0.05,
+            error_callback: Optional[Callable[[Any, int, int, Exception], None]] = None
+        ) -> None:
+
+        self.db_path = db_path
+        self.batch_size = max(batch_size, 1)
+        """每批最多写入的消息数"""
+
+        self.flush_interval = flush_interval
+        """写入队列等待凑批的最长时间 单位秒"""
+
+        self._error_callback = error_callback
+        # (消息, 用户 qq, 存储时间, 失效时间, 消息数据)
+        self._queue: list[tuple[Any, int, int, int, str]] = []
+        self._queue_cond = Condition()
+        # sqlite 连接不能同时在多个线程中使用
+        self._lock = Lock()
+        self._closed = False
+
+        self._link = sqlite3.connect(db_path, check_same_thread=False)
+        self._link.execute("PRAGMA journal_mode=WAL")
+        self._link.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+
+        self._writer = Thread(target=self._write_loop, name="message_store_writer", daemon=True)
+        self._writer.start()
+
+    def _migrate(self) -> None:
+        """
+        按 user_version 升级数据库结构
+        """
+        version = self._link.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            self._link.close()
+            raise RuntimeError("长效消息存储数据库版本 %s 高于当前支持的版本 %s" % (version, SCHEMA_VERSION))
+
+        if version == SCHEMA_VERSION:
+            return
+
+        with self._lock, self._link:
+            self._link.execute("BEGIN")
+            for migration in _MIGRATIONS[version:]:
+                for sql in migration:
+                    self._link.execute(sql)
+
+            self._link.execute("PRAGMA user_version = %d" % SCHEMA_VERSION)
+            logging.info("长效消息存储数据库版本 %s -> %s" % (version, SCHEMA_VERSION))
+
+    def add(self, message: Any, user_id: int, time_int: int, time_end: int, message_data: str) -> None:
+        """
+        添加消息 写入线程按批次提交
+        """
+        with self._queue_cond:
+            if self._closed:
+                raise RuntimeError("长效消息存储已关闭")
+
+            self._queue.append((message, user_id, time_int, time_end, message_data))
+            if len(self._queue) >= self.batch_size:
+                self._queue_cond.notify()
+
+    def _take_batch(self) -> list[tuple[Any, int, int, int, str]]:
+        with self._queue_cond:
+            batch, self._queue = self._queue, []
+            return batch
+
+    def flush(self) -> None:
+        """
+        立即提交队列中的写入
+        """
+        batch = self._take_batch()
+        if not batch:
+            return
+
+        try:
+            with self._lock, self._link:
+                self._link.executemany("INSERT INTO `Message` (userId, stime, etime, messageData) VALUES (?, ?, ?, ?)",
+                    [item[1:] for item in batch])
+        except Exception as err:
+            if self._error_callback is None:
+                logging.exception(err)
+                return
+
+            for message, _, time_int, time_end, _ in batch:
+                self._error_callback(message, time_int, time_end, err)
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._queue_cond:
+                if not self._queue and not self._closed:
+                    self._queue_cond.wait()
+
+                if self._closed and not self._queue:
+                    return
+
+            # 等待同一波消息凑成一批
+            if len(self._queue) < self.batch_size:
+                time.sleep(self.flush_interval)
+
+            self.flush()
+
+    def get(self, user_id: int) -> list[tuple[int, int, int, int, str]]:
+        """
+        获取用户存储的消息
+        """
+        self.flush()
+        with self._lock:
+            return self._link.execute("SELECT * FROM `Message` WHERE userId = ?", (user_id, )).fetchall()
+
+    def execute(self, sql: str, parameters: Union[tuple, dict[str, Any]] = ()) -> list[tuple]:
+        """
+        执行 SQL 并返回所有结果 在同一事务中提交
+        """
+        self.flush()
+        with self._lock, self._link:
+            return self._link.execute(sql, parameters).fetchall()
+
+    def expire(self, now: int) -> list[tuple[int, int, int, int, str]]:
+        """
+        删除并返回已失效的消息 按 etime 索引一次范围删除
+        """
+        with self._lock, self._link:
+            if _SQLITE_RETURNING:
+                return self._link.execute("DELETE FROM `Message` WHERE etime < ? RETURNING *", (now, )).fetchall()
+
+            data_list = self._link.execute("SELECT * FROM `Message` WHERE etime < ?", (now, )).fetchall()
+            if data_list:
+                self._link.execute("DELETE FROM `Message` WHERE etime < ?", (now, ))
+
+            return data_list
+
+    def next_expire(self) -> Optional[int]:
+        """
+        最早的失效时间 没有消息时返回 None
+        """
+        self.flush()
+        with self._lock:
+            return self._link.execute("SELECT MIN(etime) FROM `Message`").fetchone()[0]
+
+    def close(self) -> None:
+        """
+        提交队列中的写入并关闭连接
+        """
+        with self._queue_cond:
+            if self._closed:
+                return
+
+            self._closed = True
+            self._queue_cond.notify()
+
+        self._writer.join()
+        self.flush()
+        with self._lock:
+            self._link.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
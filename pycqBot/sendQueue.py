@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Coroutine, Iterator, Optional
+import asyncio
+import logging
+import time
+
+
+SEND_PRIORITY_REPLY = 0
+"""回复消息 (指令回复等) 优先发送"""
+
+SEND_PRIORITY_NORMAL = 1
+"""普通消息"""
+
+SEND_PRIORITY_BROADCAST = 2
+"""广播消息 (定时任务等) 最后发送"""
+
+SEND_API = ("/send_msg", "/send_group_msg", "/send_private_msg", "/send_group_forward_msg", "/send_private_forward_msg")
+"""经过发送队列的 go-cqhttp Api"""
+
+# 当前线程 / 协程发送消息的优先级
+send_priority: ContextVar[int] = ContextVar("send_priority", default=SEND_PRIORITY_NORMAL)
+
+
+@contextmanager
+def set_send_priority(priority: int) -> Iterator[None]:
+    """
+    设置该上下文中发送消息的优先级
+    """
+    token = send_priority.set(priority)
+    try:
+        yield
+    finally:
+        send_priority.reset(token)
+
+
+class tokenBucket:
+    """
+    令牌桶 rate 每秒补充令牌数 burst 最多可积攒的令牌数 rate <= 0 时不限制
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens: float = self.burst
+        self._time = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """
+        距离可以取出令牌还需等待的秒数 为 0 时可以取出
+        """
+        if self.rate <= 0:
+            return 0
+
+        self.tokens = min(self.burst, self.tokens + (now - self._time) * self.rate)
+        self._time = now
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        if self.rate > 0:
+            self.tokens -= 1
+
+    def is_full(self) -> bool:
+        self.wait_time(time.monotonic())
+        return self.rate <= 0 or self.tokens >= self.burst
+
+
+class _sendItem:
+
+    def __init__(self, api: str, data: dict[str, Any], target: tuple[str, Any], future: asyncio.Future) -> None:
+        self.api = api
+        self.data = data
+        self.target = target
+        self.futures = [future]
+
+
+class sendQueue:
+    """
+    消息发送队列
+
+    按优先级发送消息, 通过全局与每个发送目标 (群 / 私聊) 的令牌桶限制发送速度
+    所有操作需要在 cqapi 事件循环中进行
+    """
+
+    def __init__(self,
+            link: Callable[[str, dict[str, Any]], Coroutine[Any, Any, Optional[dict]]],
+            rate: float = 5,
+            burst: int = 5,
+            target_rate: float = 1,
+            target_burst: int = 3,
+            max_size: int = 1000,
+            merge: bool = False,
+            merge_max_length: int = 1000,
+            drop_callback: Optional[Callable[[str, dict[str, Any]], None]] = None
+        ) -> None:
+
+        self._link = link
+        self._lanes: tuple[deque[_sendItem], ...] = (deque(), deque(), deque())
+        self._global_bucket = tokenBucket(rate, burst)
+        self._target_bucket: dict[tuple[str, Any], tokenBucket] = {}
+        self._target_rate = target_rate
+        self._target_burst = target_burst
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Future] = None
+        self._drop_callback = drop_callback
+        self.max_size = max_size
+        """队列最大长度 超出时丢弃优先级最低的最早消息"""
+
+        self.merge = merge
+        """是否合并同一目标排队中的文本消息"""
+
+        self.merge_max_length = merge_max_length
+        """合并后消息的最大长度"""
+
+        self.depth = 0
+        """当前排队数"""
+
+        self.max_depth = 0
+        """排队数最高值"""
+
+        self.sent_count = 0
+        """已发送数"""
+
+        self.drop_count = 0
+        """丢弃数"""
+
+        self.merge_count = 0
+        """合并数"""
+
+    def get_status(self) -> dict[str, Any]:
+        """
+        获取发送队列状态
+        """
+        return {
+            "depth": self.depth,
+            "lane_depth": [len(lane) for lane in self._lanes],
+            "max_depth": self.max_depth,
+            "sent": self.sent_count,
+            "dropped": self.drop_count,
+            "merged": self.merge_count,
+        }
+
+    @staticmethod
+    def _get_target(data: dict[str, Any]) -> tuple[str, Any]:
+        """
+        消息发送目标 私聊 (包括带 group_id 的临时会话) 按 user_id, 群聊按 group_id
+        """
+        message_type = data.get("message_type")
+        if message_type == "group":
+            return ("group", data.get("group_id"))
+
+        if message_type == "private" or data.get("user_id") is not None:
+            return ("private", data.get("user_id"))
+
+        return ("group", data.get("group_id"))
+
+    def _merge(self, lane: deque[_sendItem], api: str, data: dict[str, Any], target: tuple[str, Any], future: asyncio.Future) -> bool:
+        """
+        合并到该目标排队中的最后一条文本消息
+        """
+        if api != "/send_msg" or type(data.get("message")) is not str:
+            return False
+
+        for item in reversed(lane):
+            if item.target != target:
+                continue
+
+            if (item.api != api
+                    or any(item.data.get(key) != data.get(key) for key in ("message_type", "user_id", "group_id", "auto_escape"))
+                    or type(item.data.get("message")) is not str):
+                return False
+
+            message = "%s\n%s" % (item.data["message"], data["message"])
+            if len(message) > self.merge_max_length:
+                return False
+
+            item.data = {**item.data, "message": message}
+            item.futures.append(future)
+            self.merge_count += 1
+            return True
+
+        return False
+
+    def _drop(self, priority: int) -> bool:
+        """
+        丢弃优先级不高于 priority 的最早消息 没有可以丢弃的消息时返回 False
+        """
+        for lane in reversed(self._lanes[priority:]):
+            if not lane:
+                continue
+
+            item = lane.popleft()
+            self.depth -= 1
+            self._drop_item(item)
+            return True
+
+        return False
+
+    def _drop_item(self, item: _sendItem) -> None:
+        self.drop_count += len(item.futures)
+        for future in item.futures:
+            if not future.done():
+                future.set_result(None)
+
+        if self._drop_callback is not None:
+            self._drop_callback(item.api, item.data)
+
+    async def send(self, api: str, data: dict[str, Any], priority: int = SEND_PRIORITY_NORMAL) -> Optional[dict]:
+        """
+        添加到发送队列 等待发送完成后返回 go-cqhttp 响应, 被丢弃时返回 None
+        """
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+        priority = min(max(priority, SEND_PRIORITY_REPLY), SEND_PRIORITY_BROADCAST)
+        lane = self._lanes[priority]
+        target = self._get_target(data)
+        future = asyncio.get_running_loop().create_future()
+
+        if self.merge and self._merge(lane, api, data, target, future):
+            return await future
+
+        if self.depth >= self.max_size and not self._drop(priority):
+            self._drop_item(_sendItem(api, data, target, future))
+            return await future
+
+        lane.append(_sendItem(api, data, target, future))
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        self._wakeup.set()
+        return await future
+
+    def _get_bucket(self, target: tuple[str, Any]) -> tokenBucket:
+        bucket = self._target_bucket.get(target)
+        if bucket is None:
+            if len(self._target_bucket) > 1024:
+                # 清理已经回满的令牌桶
+                self._target_bucket = {key: value for key, value in self._target_bucket.items() if not value.is_full()}
+
+            bucket = self._target_bucket[target] = tokenBucket(self._target_rate, self._target_burst)
+
+        return bucket
+
+    def _next_item(self) -> tuple[Optional[_sendItem], Optional[float]]:
+        """
+        取出下一条可以发送的消息 没有时返回需要等待的秒数
+        """
+        if self.depth == 0:
+            return None, None
+
+        now = time.monotonic()
+        wait = self._global_bucket.wait_time(now)
+        if wait > 0:
+            return None, wait
+
+        for lane in self._lanes:
+            for item in lane:
+                target_wait = self._get_bucket(item.target).wait_time(now)
+                if target_wait > 0:
+                    wait = target_wait if wait == 0 else min(wait, target_wait)
+                    continue
+
+                lane.remove(item)
+                self.depth -= 1
+                self._global_bucket.take()
+                self._get_bucket(item.target).take()
+                return item, None
+
+        return None, wait
+
+    async def _run(self) -> None:
+        while True:
+            item, wait = self._next_item()
+            if item is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                json = await self._link(item.api, item.data)
+            except Exception as err:
+                logging.exception(err)
+                json = None
+
+            self.sent_count += 1
+            for future in item.futures:
+                if not future.done():
+                    future.set_result(json)
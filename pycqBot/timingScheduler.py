@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, time as dtime
+from typing import Any, Callable, Coroutine, Optional, Union
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+
+
+TIMING_MISFIRE = ("skip", "coalesce", "run_all")
+"""
+错过运行时间 (阻塞或 bot 未运行) 时的处理策略
+
+    skip 跳过超过 misfire_grace 秒的运行\n
+    coalesce 错过多次只运行一次\n
+    run_all 依次补上所有错过的运行
+"""
+
+# run_all 一次最多补上的运行次数
+_MISFIRE_MAX = 1000
+
+
+class intervalTrigger:
+    """
+    固定间隔 下次运行时间按上次计划时间计算
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = max(interval, 0.001)
+
+    def __call__(self, after: float) -> float:
+        return after + self.interval
+
+    def skip(self, after: float, now: float) -> float:
+        """
+        after 之后第一个晚于 now 的运行时间
+        """
+        return after + ((now - after) // self.interval + 1) * self.interval
+
+
+def _cron_field(field: str, low: int, high: int) -> list[int]:
+    values: set[int] = set()
+    for part in field.split(","):
+        part, has_step, step = part.partition("/")
+        step = int(step) if has_step else 1
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if has_step else start
+
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError("cron 字段超出范围: %s" % field)
+
+        values.update(range(start, end + 1, step))
+
+    return sorted(values)
+
+
+class cronTrigger:
+    """
+    cron 表达式 "分 时 日 月 周" 使用本地时间
+
+    支持 * , - / 周日为 0 或 7, 日与周同时指定时满足其一即可
+    """
+
+    def __init__(self, expression: str) -> None:
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError("cron 表达式需要 5 个字段: %s" % expression)
+
+        self.expression = expression
+        self.minute = _cron_field(fields[0], 0, 59)
+        self.hour = _cron_field(fields[1], 0, 23)
+        self.day = set(_cron_field(fields[2], 1, 31))
+        self.month = set(_cron_field(fields[3], 1, 12))
+        self.weekday = {weekday % 7 for weekday in _cron_field(fields[4], 0, 7)}
+        self._day_any = fields[2] == "*"
+        self._weekday_any = fields[4] == "*"
+
+    def _match_date(self, date: datetime) -> bool:
+        if date.month not in self.month:
+            return False
+
+        day = date.day in self.day
+        weekday = date.isoweekday() % 7 in self.weekday
+        if self._day_any:
+            return weekday
+
+        if self._weekday_any:
+            return day
+
+        return day or weekday
+
+    def __call__(self, after: float) -> Optional[float]:
+        start = datetime.fromtimestamp(after).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        date = datetime.combine(start.date(), dtime())
+        # 2 月 29 日等最多需要查找 8 年
+        for _ in range(366 * 8):
+            if self._match_date(date):
+                for hour in self.hour:
+                    for minute in self.minute:
+                        run_time = date.replace(hour=hour, minute=minute)
+                        if run_time >= start:
+                            return run_time.timestamp()
+
+            date += timedelta(days=1)
+
+        return None
+
+    def skip(self, after: float, now: float) -> Optional[float]:
+        return self(now)
+
+
+class atTrigger:
+    """
+    固定时间 每天 "HH:MM[:SS]" 或只运行一次 "YYYY-MM-DD HH:MM[:SS]" 使用本地时间
+    """
+
+    def __init__(self, at: Union[str, list[str]]) -> None:
+        self.daily: list[dtime] = []
+        self.once: list[float] = []
+        for value in ([at] if type(at) is str else at):
+            value = value.strip()
+            if len(value) > 8:
+                self.once.append(datetime.fromisoformat(value).timestamp())
+            else:
+                self.daily.append(dtime.fromisoformat(value))
+
+        self.daily.sort()
+        self.once.sort()
+
+    def __call__(self, after: float) -> Optional[float]:
+        run_times = [run_time for run_time in self.once if run_time > after][:1]
+        date = datetime.fromtimestamp(after).date()
+        for offset in range(2):
+            for daily in self.daily:
+                run_time = datetime.combine(date + timedelta(days=offset), daily).timestamp()
+                if run_time > after:
+                    run_times.append(run_time)
+                    break
+
+        return min(run_times) if run_times else None
+
+    def skip(self, after: float, now: float) -> Optional[float]:
+        return self(now)
+
+
+TimingTrigger = Union[intervalTrigger, cronTrigger, atTrigger]
+
+
+class _timingItem:
+
+    def __init__(self, name: str, trigger: TimingTrigger, callback: Callable[[], Coroutine], jitter: float, misfire: str, misfire_grace: float) -> None:
+        self.name = name
+        self.trigger = trigger
+        self.callback = callback
+        self.jitter = jitter
+        self.misfire = misfire
+        self.misfire_grace = misfire_grace
+        # 计划运行时间 不包括随机延迟
+        self.next_time: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        # run_all 等待补上的运行次数
+        self.pending = 0
+        self.removed = False
+        self.run_count = 0
+        self.skip_count = 0
+
+
+class timingScheduler:
+    """
+    定时任务调度器
+
+    所有定时任务在同一个事件循环中按最小堆调度
+    下次运行时间按计划时间计算, 不受任务运行时间影响, 上次运行未结束时跳过本次运行
+    """
+
+    def __init__(self,
+            loop: asyncio.AbstractEventLoop,
+            skip_callback: Optional[Callable[[str], None]] = None,
+            record_callback: Optional[Callable[[str, float], None]] = None
+        ) -> None:
+
+        self._loop = loop
+        self._record_callback = record_callback
+        self._heap: list[tuple[float, int, _timingItem]] = []
+        self._items: dict[str, _timingItem] = {}
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._skip_callback = skip_callback
+
+    def add(self,
+            name: str,
+            trigger: TimingTrigger,
+            callback: Callable[[], Coroutine],
+            jitter: float = 0,
+            misfire: str = "coalesce",
+            misfire_grace: float = 60,
+            last_time: Optional[float] = None
+        ) -> None:
+        """
+        添加定时任务 同名任务会被替换, 可以在任意线程调用
+
+        jitter 每次运行随机延迟的最大秒数 misfire 错过运行时间时的处理策略
+        last_time 上次运行的计划时间, 为 None 时固定间隔任务立即运行
+        """
+        if misfire not in TIMING_MISFIRE:
+            raise ValueError("未知定时任务错过处理策略: %s" % misfire)
+
+        item = _timingItem(name, trigger, callback, jitter, misfire, misfire_grace)
+        self._loop.call_soon_threadsafe(self._add, item, last_time)
+
+    def remove(self, name: str) -> None:
+        """
+        删除定时任务 正在运行的任务会运行完成, 可以在任意线程调用
+        """
+        self._loop.call_soon_threadsafe(self._remove, name)
+
+    def get_status(self) -> dict[str, dict[str, Any]]:
+        """
+        获取定时任务状态 需要在调度器事件循环中调用
+        """
+        now = time.time()
+        return {
+            name: {
+                "run": item.run_count,
+                "skip": item.skip_count,
+                "pending": item.pending,
+                "running": item.task is not None and not item.task.done(),
+                "next": None if item.next_time is None else max(item.next_time - now, 0),
+            }
+            for name, item in self._items.items()
+        }
+
+    def _add(self, item: _timingItem, last_time: Optional[float]) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+
+        self._remove(item.name)
+        self._items[item.name] = item
+        if last_time is not None:
+            item.next_time = item.trigger(last_time)
+        elif type(item.trigger) is intervalTrigger:
+            item.next_time = time.time()
+        else:
+            item.next_time = item.trigger(time.time())
+
+        if item.next_time is None:
+            logging.warning("定时任务 %s 没有下次运行时间, 不会运行" % item.name)
+            return
+
+        self._push(item)
+
+    def _remove(self, name: str) -> None:
+        item = self._items.pop(name, None)
+        if item is not None:
+            item.removed = True
+
+    def _push(self, item: _timingItem) -> None:
+        run_time = item.next_time + (random.uniform(0, item.jitter) if item.jitter > 0 else 0)
+        heapq.heappush(self._heap, (run_time, next(self._seq), item))
+        self._wakeup.set()
+
+    def _fire(self, item: _timingItem, count: int) -> None:
+        if item.task is not None and not item.task.done():
+            if item.misfire == "run_all":
+                item.pending += count
+                return
+
+            # 上次运行未结束
+            item.skip_count += count
+            if self._skip_callback is not None:
+                self._skip_callback(item.name)
+            return
+
+        item.pending = count
+        item.task = self._loop.create_task(self._run_item(item))
+        item.task.add_done_callback(self._fire_done)
+
+    async def _run_item(self, item: _timingItem) -> None:
+        while item.pending > 0 and not item.removed:
+            item.pending -= 1
+            item.run_count += 1
+            await item.callback()
+
+        item.pending = 0
+
+    def _get_due(self, item: _timingItem, now: float) -> tuple[list[float], Optional[float]]:
+        """
+        获取所有已到运行时间的计划时间与下次运行时间
+        """
+        due = [item.next_time]
+        next_time = item.trigger(item.next_time)
+        while next_time is not None and next_time <= now and len(due) < _MISFIRE_MAX:
+            due.append(next_time)
+            next_time = item.trigger(next_time)
+
+        if next_time is not None and next_time <= now:
+            next_time = item.trigger.skip(next_time, now)
+
+        return due, next_time
+
+    @staticmethod
+    def _fire_done(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logging.exception(task.exception())
+
+    async def _run(self) -> None:
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            run_time, _, item = self._heap[0]
+            wait = run_time - time.time()
+            if wait > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            if item.removed:
+                continue
+
+            # 按计划时间计算下次运行时间 错过的运行按 misfire 处理
+            now = time.time()
+            due, item.next_time = self._get_due(item, now)
+            if item.misfire == "run_all":
+                count = len(due)
+            elif item.misfire == "coalesce":
+                count = 1
+            else:
+                count = 1 if now - due[-1] <= item.misfire_grace + item.jitter else 0
+
+            item.skip_count += len(due) - count
+            if count > 0:
+                self._fire(item, count)
+
+            if self._record_callback is not None:
+                self._record_callback(item.name, due[-1])
+
+            if item.next_time is not None:
+                self._push(item)
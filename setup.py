@@ -39,5 +39,9 @@ setup(
         "lxml",
         "pyyaml"
     ],
+    extras_require={
+        "orjson": ["orjson"],
+        "ujson": ["ujson"],
+    },
     python_requires='>=3.9'
 )
\ No newline at end of file